@@ -0,0 +1,69 @@
+"""Асинхронные обёртки для read-heavy эндпоинтов в режиме ASGI.
+
+В Django 3.2 нет асинхронного ORM, поэтому синхронная вьюха целиком
+выполняется в ограниченном пуле потоков, а event loop остаётся свободным
+для медленных клиентов. Размер пула задаёт ASYNC_VIEWS_THREADS.
+
+В пул уходят только GET и HEAD. Записи выполняются так же, как
+синхронные вьюхи Django под ASGI: в общем потоке (thread_sensitive),
+вместе с остальным синхронным кодом запроса.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .views import (IngredientsViewSet, RecipesViewSet, TagsViewSet,
+                    download_shopping_cart,
+                    )
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEWS_THREADS,
+    thread_name_prefix='async-views')
+
+
+def run_view(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def async_view(view):
+    """Превращает синхронную вьюху в корутину.
+
+    Чтения идут в общий пул потоков, остальные методы — в синхронную
+    вьюху как есть.
+    """
+
+    run = sync_to_async(run_view, thread_sensitive=False, executor=executor)
+    write = sync_to_async(view, thread_sensitive=True)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await run(view, request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+    return wrapper
+
+
+recipe_list = async_view(
+    RecipesViewSet.as_view({'get': 'list', 'post': 'create'}))
+recipe_detail = async_view(
+    RecipesViewSet.as_view({
+        'get': 'retrieve', 'put': 'update',
+        'patch': 'partial_update', 'delete': 'destroy'}))
+ingredient_list = async_view(
+    IngredientsViewSet.as_view({'get': 'list', 'post': 'create'}))
+tag_list = async_view(
+    TagsViewSet.as_view({'get': 'list', 'post': 'create'}))
+shopping_cart_download = async_view(download_shopping_cart)
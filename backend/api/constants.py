@@ -1 +1,4 @@
 EROR_LOGIN = 'Данные неверные, попробуйте снова'
+BATCH_RECIPES_LIMIT = 100
+COOK_INGREDIENTS_LIMIT = 100
+MAX_SERVINGS = 100
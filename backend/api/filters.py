@@ -1,6 +1,8 @@
 from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
 import django_filters as filters
 
+from recipes import registry, search
 from recipes.models import Ingredient, Recipe
 from users.models import User
 
@@ -20,9 +22,23 @@ class TagsMultipleChoiceField(
                     params={'value': val},)
 
 
-class TagsFilter(filters.AllValuesMultipleFilter):
+class TagsFilter(filters.MultipleChoiceFilter):
+    """Фильтр по slug тэгов без запроса списка вариантов и дублей."""
+
     field_class = TagsMultipleChoiceField
 
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        tags = registry.get_tag_ids_by_slug()
+        tag_ids = [
+            tag_id for slug in set(value) for tag_id in tags.get(slug, ())]
+        if not tag_ids:
+            return qs.none()
+        return qs.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag_id__in=tag_ids)))
+
 
 class IngredientFilter(filters.FilterSet):
     name = filters.CharFilter(lookup_expr='istartswith')
@@ -36,15 +52,70 @@ class RecipeFilter(filters.FilterSet):
     author = filters.ModelChoiceFilter(
         queryset=User.objects.all())
     is_in_shopping_cart = filters.BooleanFilter(
+        method='filter_user_list',
         widget=filters.widgets.BooleanWidget(),
         label='В корзине.')
     is_favorited = filters.BooleanFilter(
+        method='filter_user_list',
         widget=filters.widgets.BooleanWidget(),
         label='В избранных.')
-    tags = filters.AllValuesMultipleFilter(
+    tags = TagsFilter(
         field_name='tags__slug',
         label='Ссылка')
+    search = filters.CharFilter(
+        method='filter_search',
+        label='Поиск')
+    # Сравнение с NULL ложно: рецепты с неизвестной пищевой ценностью
+    # фильтры по диапазону не проходят.
+    kcal_min = filters.NumberFilter(
+        field_name='kcal', lookup_expr='gte',
+        label='Калорийность от')
+    kcal_max = filters.NumberFilter(
+        field_name='kcal', lookup_expr='lte',
+        label='Калорийность до')
+    protein_min = filters.NumberFilter(
+        field_name='protein', lookup_expr='gte',
+        label='Белки от')
+    protein_max = filters.NumberFilter(
+        field_name='protein', lookup_expr='lte',
+        label='Белки до')
+    fat_min = filters.NumberFilter(
+        field_name='fat', lookup_expr='gte',
+        label='Жиры от')
+    fat_max = filters.NumberFilter(
+        field_name='fat', lookup_expr='lte',
+        label='Жиры до')
+    carbs_min = filters.NumberFilter(
+        field_name='carbs', lookup_expr='gte',
+        label='Углеводы от')
+    carbs_max = filters.NumberFilter(
+        field_name='carbs', lookup_expr='lte',
+        label='Углеводы до')
 
     class Meta:
         model = Recipe
-        fields = ['is_favorited', 'is_in_shopping_cart', 'author', 'tags']
+        fields = [
+            'is_favorited', 'is_in_shopping_cart', 'author', 'tags', 'search',
+            'kcal_min', 'kcal_max', 'protein_min', 'protein_max',
+            'fat_min', 'fat_max', 'carbs_min', 'carbs_max']
+
+    USER_LIST_LOOKUPS = {
+        'is_favorited': 'favorite_recipe__user',
+        'is_in_shopping_cart': 'shopping_cart__user',
+    }
+
+    def filter_user_list(self, queryset, name, value):
+        """Фильтр по избранному/корзине через join со списком юзера."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.none() if value else queryset
+        lookup = {self.USER_LIST_LOOKUPS[name]: user}
+        if value:
+            return queryset.filter(**lookup)
+        return queryset.exclude(**lookup)
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с сортировкой по релевантности."""
+        if not value.strip():
+            return queryset
+        return search.search(queryset, value)
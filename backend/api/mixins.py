@@ -1,16 +1,23 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
 from django.shortcuts import get_object_or_404
-from rest_framework.permissions import AllowAny
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 
+from foodgram.replicas import (is_pinned, start_replica_reads,
+                               stop_replica_reads)
 from recipes.models import Recipe
 from .permissions import IsAdminOrReadOnly
-from .serializers import SubscribeRecipeSerializer
+from .serializers import RecipeIdsSerializer, SubscribeRecipeSerializer
 
 
 class GetObjectMixin:
     """Миксин для удаления/добавления рецептов избранных/корзины."""
 
     serializer_class = SubscribeRecipeSerializer
-    permission_classes = (AllowAny,)
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    throttle_scope = 'toggle'
 
     def get_object(self):
         recipe_id = self.kwargs['recipe_id']
@@ -19,8 +26,151 @@ class GetObjectMixin:
         return recipe
 
 
+class RecipeToggleMixin(GetObjectMixin):
+    """Миксин для атомарного добавления/удаления рецепта в список юзера.
+
+    Добавление — один INSERT в связующую таблицу, удаление — один DELETE;
+    существование рецепта проверяется только при ошибке. Сам список
+    юзера создаётся при первом добавлении.
+    """
+
+    list_model = None
+    already_added_message = 'Рецепт уже добавлен!'
+    not_added_message = 'Рецепта нет в списке!'
+
+    def get_through(self):
+        return self.list_model.recipe.through
+
+    def get_list_field(self):
+        return self.list_model.recipe.field.m2m_field_name()
+
+    def get_entry_fields(self, request):
+        """Дополнительные поля записи связующей таблицы из запроса."""
+        return {}
+
+    def error_response(self, message):
+        if not Recipe.objects.filter(id=self.kwargs['recipe_id']).exists():
+            return Response(
+                {'errors': 'Рецепт не найден!'},
+                status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {'errors': message},
+            status=status.HTTP_400_BAD_REQUEST)
+
+    def create_user_list(self, user):
+        """Создать список юзера при первом добавлении.
+
+        Возвращает False, если список уже был: тогда ошибка вставки
+        вызвана не его отсутствием. get_or_create опирается на
+        уникальность user, поэтому гонка двух запросов безопасна.
+        """
+        _, created = self.list_model.objects.get_or_create(user=user)
+        return created
+
+    def insert_entries(self, user, rows):
+        """Вставить записи в связующую таблицу одним запросом.
+
+        id списка берётся подзапросом; если списка ещё нет, вставка
+        падает на NOT NULL, список создаётся и вставка повторяется.
+        """
+        user_list = self.list_model.objects.filter(user=user).values('id')
+        through = self.get_through()
+        list_field = f'{self.get_list_field()}_id'
+        entries = [
+            through(**{list_field: Subquery(user_list), **row})
+            for row in rows]
+        try:
+            with transaction.atomic():
+                through.objects.bulk_create(entries)
+        except IntegrityError:
+            if not self.create_user_list(user):
+                raise
+            with transaction.atomic():
+                through.objects.bulk_create(entries)
+
+    def create(self, request, *args, **kwargs):
+        entry_fields = self.get_entry_fields(request)
+        try:
+            self.insert_entries(request.user, [{
+                'recipe_id': self.kwargs['recipe_id'], **entry_fields}])
+        except IntegrityError:
+            return self.error_response(self.already_added_message)
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def destroy(self, request, *args, **kwargs):
+        deleted, _ = self.get_through().objects.filter(**{
+            f'{self.get_list_field()}__user': request.user,
+            'recipe_id': self.kwargs['recipe_id']}).delete()
+        if not deleted:
+            return self.error_response(self.not_added_message)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RecipeBatchToggleMixin(RecipeToggleMixin):
+    """Миксин для пакетного добавления/удаления рецептов.
+
+    Рецепты проверяются одним запросом, вставка и удаление — одним
+    запросом на весь список (вставке предшествует поиск списка юзера).
+    """
+
+    def get_recipes(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    def insert_missing_entries(self, user, recipes):
+        """Вставить рецепты, которых ещё нет в списке, одним запросом.
+
+        Повторы пропускает ignore_conflicts. На SQLite это INSERT OR
+        IGNORE, который молча пропускает и нарушение NOT NULL, поэтому
+        id списка не берётся подзапросом: список находится или создаётся
+        заранее.
+        """
+        user_list, _ = self.list_model.objects.get_or_create(user=user)
+        through = self.get_through()
+        list_field = f'{self.get_list_field()}_id'
+        through.objects.bulk_create(
+            (through(**{list_field: user_list.id, 'recipe_id': recipe.id})
+             for recipe in recipes),
+            ignore_conflicts=True)
+
+    def create(self, request, *args, **kwargs):
+        recipes = self.get_recipes(request)
+        self.insert_missing_entries(request.user, recipes)
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def destroy(self, request, *args, **kwargs):
+        recipes = self.get_recipes(request)
+        self.get_through().objects.filter(**{
+            f'{self.get_list_field()}__user': request.user,
+            'recipe_id__in': [recipe.id for recipe in recipes]}).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class PermissionAndPaginationMixin:
     """Миксин для списка тегов и ингридиентов."""
 
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = None
+
+
+class ReplicaReadMixin:
+    """Миксин для чтения безопасных запросов с реплики.
+
+    Аутентификация выполняется до переключения и читает из основной
+    базы; пользователь, недавно что-то записавший, читает оттуда же.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.replica_token = start_replica_reads(
+            request.method in SAFE_METHODS and not is_pinned(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'replica_token', None)
+        if token is not None:
+            stop_replica_reads(token)
+            self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,6 +1,123 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по плану запроса PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с приблизительным count для больших таблиц.
+
+    Ниже порога ESTIMATED_COUNT_THRESHOLD считается точный COUNT(*).
+    Выше порога на PostgreSQL берётся оценка планировщика, на остальных
+    базах точный count кэшируется на ESTIMATED_COUNT_CACHE_TTL секунд.
+    Порог 0 (по умолчанию) отключает оценку.
+
+    Оценка может разойтись с выборкой в обе стороны, поэтому при ней
+    номер страницы сверяется с самой выборкой: страница за концом
+    выборки заменяется последней, а count уточняется по прочитанной
+    странице.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+        if not threshold or not hasattr(self.object_list, 'query'):
+            return super().count
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        estimate = estimate_count(self.object_list)
+        if estimate is not None:
+            if estimate < threshold:
+                return super().count
+            self.estimated = True
+            return estimate
+        key = 'paginator:count:' + hashlib.md5(
+            f'{self.object_list.db}:{sql}:{params}'.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            if count >= threshold:
+                cache.set(key, count, settings.ESTIMATED_COUNT_CACHE_TTL)
+        else:
+            self.estimated = True
+        return count
+
+    def set_count(self, count):
+        self.__dict__['count'] = count
+        self.__dict__.pop('num_pages', None)
+
+    def validate_number(self, number):
+        if not self.count or not self.estimated:
+            return super().validate_number(number)
+        # С num_pages по оценке не сверяемся: существующая страница
+        # получила бы 404. Выход за конец выборки проверяет page().
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        if not self.count or not self.estimated:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # Лишняя строка показывает, есть ли выборка дальше страницы.
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if len(rows) > self.per_page:
+            self.set_count(max(self.count, bottom + len(rows)))
+            return self._get_page(rows[:self.per_page], number, self)
+        if rows or number == 1:
+            self.set_count(bottom + len(rows))
+            return self._get_page(rows, number, self)
+        self.set_count(self.object_list.count())
+        return super().page(max(self.num_pages, 1))
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+    django_paginator_class = EstimatedCountPaginator
+
+
+class FeedCursorPagination(CursorPagination):
+    """Keyset-пагинация ленты по дате публикации."""
+
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-feed_date', '-id')
+
+
+class RecommendationCursorPagination(CursorPagination):
+    """Keyset-пагинация рекомендаций по убыванию оценки."""
+
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-recommendation_score', '-id')
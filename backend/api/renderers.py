@@ -0,0 +1,73 @@
+import re
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Экспонента в выводе orjson: цифра, e, затем цифра или минус. Поиск
+# начинается с литерала e, цифра перед ним проверяется отдельно.
+EXPONENT = re.compile(rb'e[-0-9]')
+
+
+def use_orjson():
+    return orjson is not None and settings.JSON_BACKEND == 'orjson'
+
+
+def has_orjson_only_float(output):
+    """Есть ли в выводе orjson число, которое json запишет иначе.
+
+    json пишет float вне 1e-4 <= |x| < 1e16 в форме repr (1e+16, 1e-07,
+    1e-05), orjson — без знака и нуля в экспоненте (1e16, 1e-7) или без
+    экспоненты (0.00001). Совпадение внутри строки лишь отправляет ответ
+    в стандартный путь.
+    """
+    if b'0.0000' in output:
+        return True
+    return any(
+        output[match.start() - 1:match.start()].isdigit()
+        for match in EXPONENT.finditer(output))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с откатом на стандартный json.
+
+    Вывод побайтно совпадает с JSONRenderer: даты и прочие нестандартные
+    типы кодируются через JSONEncoder DRF, а всё, что orjson не умеет или
+    пишет иначе (отступы, ключи-не-строки, большие целые, float в
+    экспоненциальной записи), уходит в стандартный путь. Исключение —
+    NaN и Infinity: orjson пишет их как null, тогда как JSONRenderer
+    отвечает ValueError.
+    """
+
+    encoder_default = JSONEncoder().default
+    options = 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (not use_orjson()
+                or self.ensure_ascii or not self.compact or not self.strict
+                or self.get_indent(
+                    accepted_media_type, renderer_context or {}) is not None):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS)
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        if has_orjson_only_float(ret):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
@@ -1,14 +1,18 @@
 import django.contrib.auth.password_validation as validators
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.hashers import make_password
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import Http404
 from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject
 from drf_base64.fields import Base64ImageField
 
+from recipes import nutrition, registry
 from recipes.models import (Ingredient, IngredientForRecipe,
                             Recipe, Subscribe, Tag,
                             )
-from .constants import EROR_LOGIN
+from .constants import (BATCH_RECIPES_LIMIT, COOK_INGREDIENTS_LIMIT,
+                        EROR_LOGIN, MAX_SERVINGS)
 
 User = get_user_model()
 
@@ -59,9 +63,7 @@ class UserPasswordSerializer(serializers.Serializer):
 
     def validate_current_password(self, current_password):
         user = self.context['request'].user
-        if not authenticate(
-                username=user.email,
-                password=current_password):
+        if not user.check_password(current_password):
             raise serializers.ValidationError(
                 EROR_LOGIN, code='authorization')
         return current_password
@@ -154,13 +156,28 @@ class IngredientsEditSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
+class TagRegistryField(serializers.PrimaryKeyRelatedField):
+    """Поле тэга, которое проверяет id по кэшу справочника."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            tag_id = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if tag_id not in registry.get_tags():
+            self.fail('does_not_exist', pk_value=data)
+        return tag_id
+
+
 class RecipeWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для написания рецептов."""
 
     image = Base64ImageField(
         max_length=None,
         use_url=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = TagRegistryField(
         many=True,
         queryset=Tag.objects.all())
     ingredients = IngredientsEditSerializer(
@@ -169,26 +186,23 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = '__all__'
-        read_only_fields = ('author',)
+        read_only_fields = ('author',) + nutrition.FIELDS
 
     def validate(self, data):
         ingredients = data['ingredients']
-        ingredient_list = []
+        known_ingredients = registry.get_ingredients()
+        ingredient_list = set()
         for items in ingredients:
-            ingredient = get_object_or_404(
-                Ingredient, id=items['id'])
-            if ingredient in ingredient_list:
+            if items['id'] not in known_ingredients:
+                raise Http404
+            if items['id'] in ingredient_list:
                 raise serializers.ValidationError(
                     'Такой ингредиент уже есть в рецепте!')
-            ingredient_list.append(ingredient)
+            ingredient_list.add(items['id'])
         tags = data['tags']
         if not tags:
             raise serializers.ValidationError(
                 'Добавьте тэг')
-        for tag_name in tags:
-            if not Tag.objects.filter(name=tag_name).exists():
-                raise serializers.ValidationError(
-                    f'Тэга {tag_name} не существует!')
         return data
 
     def validate_cooking_time(self, cooking_time):
@@ -214,19 +228,32 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                 ingredient_id=ingredient.get('id'),
                 amount=ingredient.get('amount'), )
 
+    def update_nutrition(self, recipe):
+        """Пересчитать пищевую ценность в транзакции записи.
+
+        Outbox пересчитает её ещё раз в фоне, но ответ на запись должен
+        вернуть итоги новых ингредиентов.
+        """
+        nutrition.update_totals([recipe.id])
+        recipe.refresh_from_db(fields=nutrition.FIELDS)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(ingredients, recipe)
+        self.update_nutrition(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         if 'ingredients' in validated_data:
             ingredients = validated_data.pop('ingredients')
             instance.ingredients.clear()
             self.create_ingredients(ingredients, instance)
+            self.update_nutrition(instance)
         if 'tags' in validated_data:
             instance.tags.set(
                 validated_data.pop('tags'))
@@ -255,6 +282,84 @@ class RecipeUserSerializer(
             'first_name', 'last_name', 'is_subscribed')
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов без вложенных сериализаторов на каждую строку.
+
+    Вывод совпадает с RecipeReadSerializer: порядок и набор полей берутся
+    из дочернего сериализатора, а для вложенных полей заранее собраны
+    функции, которые строят словари из prefetch-кэша.
+    """
+
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, 'all') else data)
+        getters = {
+            'tags': self.get_tags,
+            'author': self.get_author_getter(recipes),
+            'ingredients': self.get_ingredients,
+        }
+        fields = [
+            (field.field_name,
+             getters.get(field.field_name) or self.get_field_getter(field))
+            for field in self.child._readable_fields]
+        return [
+            {name: getter(recipe) for name, getter in fields}
+            for recipe in recipes]
+
+    @staticmethod
+    def get_field_getter(field):
+        def getter(instance):
+            attribute = field.get_attribute(instance)
+            check_for_none = (
+                attribute.pk if isinstance(attribute, PKOnlyObject)
+                else attribute)
+            if check_for_none is None:
+                return None
+            return field.to_representation(attribute)
+        return getter
+
+    @staticmethod
+    def get_tags(recipe):
+        return [
+            {'id': tag.id, 'name': tag.name,
+             'color': tag.color, 'slug': tag.slug}
+            for tag in recipe.tags.all()]
+
+    def get_author_getter(self, recipes):
+        user = self.context['request'].user
+        if user.is_authenticated:
+            subscribed = set(user.follower.filter(
+                author__in={recipe.author_id for recipe in recipes}
+            ).values_list('author_id', flat=True))
+        else:
+            subscribed = None
+
+        def getter(recipe):
+            author = recipe.author
+            return {
+                'email': author.email,
+                'id': author.id,
+                'username': author.username,
+                'first_name': author.first_name,
+                'last_name': author.last_name,
+                'is_subscribed': (
+                    None if subscribed is None
+                    else author.id in subscribed),
+            }
+        return getter
+
+    @staticmethod
+    def get_ingredients(recipe):
+        # Ингредиенты приходят из prefetch вместе с select_related, имя
+        # и единица берутся из связанного объекта без обращения к
+        # справочнику.
+        return [
+            {'id': item.ingredient_id,
+             'name': item.ingredient.name,
+             'measurement_unit': item.ingredient.measurement_unit,
+             'amount': item.amount}
+            for item in recipe.recipe.all()]
+
+
 class RecipeReadSerializer(serializers.ModelSerializer):
     """Сериализатор для чтения рецептов."""
 
@@ -277,6 +382,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = '__all__'
+        list_serializer_class = RecipeListSerializer
 
 
 class SubscribeRecipeSerializer(serializers.ModelSerializer):
@@ -287,6 +393,48 @@ class SubscribeRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор списка рецептов для пакетного добавления/удаления."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_RECIPES_LIMIT)
+
+    def validate_recipes(self, recipe_ids):
+        recipe_ids = list(dict.fromkeys(recipe_ids))
+        recipes = Recipe.objects.in_bulk(recipe_ids)
+        missing = [
+            recipe_id for recipe_id in recipe_ids
+            if recipe_id not in recipes]
+        if missing:
+            raise serializers.ValidationError(
+                f'Рецептов {missing} не существует!')
+        return [recipes[recipe_id] for recipe_id in recipe_ids]
+
+
+class ShoppingCartEntrySerializer(serializers.Serializer):
+    """Множитель порций рецепта в списке покупок.
+
+    При добавлении рецепта (partial=True) поле необязательно и берётся из
+    модели, при изменении обязательно.
+    """
+
+    servings = serializers.IntegerField(
+        min_value=1, max_value=MAX_SERVINGS)
+
+
+class CookQuerySerializer(serializers.Serializer):
+    """Параметры подбора рецептов по имеющимся ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=COOK_INGREDIENTS_LIMIT)
+    min_coverage = serializers.FloatField(
+        min_value=0, max_value=1, default=0)
+
+
 class SubscribeSerializer(serializers.ModelSerializer):
     """Сериализатор для подписок."""
 
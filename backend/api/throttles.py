@@ -0,0 +1,142 @@
+import logging
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError
+from rest_framework.throttling import SimpleRateThrottle
+
+try:
+    from pymemcache.exceptions import MemcacheError
+except ImportError:
+    MemcacheError = OSError
+
+logger = logging.getLogger(__name__)
+
+local_cache = LocMemCache('throttle-fallback', {})
+
+# Ошибки недоступного кэша: сеть, протокол memcached, таблица
+# DatabaseCache. Остальные исключения — ошибки кода, их не прячем.
+CACHE_ERRORS = (OSError, MemcacheError, DatabaseError)
+
+
+def incr_counter(cache, key, timeout):
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout)
+        return 1
+
+
+class CounterRateThrottle(SimpleRateThrottle):
+    """Ограничение по атомарному счётчику в фиксированном окне.
+
+    Счётчики хранятся в кэше THROTTLE_CACHE, и он должен быть общим для
+    воркеров: в кэше процесса (LocMemCache) каждый воркер считает сам, и
+    лимит умножается на их число. Атомарный incr даёт memcached; у
+    DatabaseCache это чтение и запись, и при одновременных запросах
+    часть приращений может потеряться. Если кэш недоступен, счётчик
+    временно ведётся в локальной памяти процесса, а в лог пишется
+    предупреждение.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        if self.incr(f'{self.key}:{window}') > self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def incr(self, key):
+        try:
+            return incr_counter(
+                caches[settings.THROTTLE_CACHE], key, self.duration)
+        except CACHE_ERRORS as error:
+            logger.warning(
+                'Кэш %s недоступен, счётчик %s ведётся в памяти процесса: '
+                '%r', settings.THROTTLE_CACHE, key, error)
+            return incr_counter(local_cache, key, self.duration)
+
+    def wait(self):
+        return self.duration - self.now % self.duration
+
+    def get_user_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+
+class ScopedCounterThrottle(CounterRateThrottle):
+    """Ограничение по throttle_scope вьюхи (как ScopedRateThrottle)."""
+
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None) or self.scope
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_user_ident(request)}
+
+
+class ShoppingCartDownloadThrottle(ScopedCounterThrottle):
+    scope = 'shopping_cart_download'
+
+
+class LoginIPThrottle(CounterRateThrottle):
+    """Ограничение попыток входа с одного IP."""
+
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)}
+
+
+class LoginEmailThrottle(CounterRateThrottle):
+    """Ограничение попыток входа на один email."""
+
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        # Тело может быть и списком, и строкой: ключа тогда нет, а ошибку
+        # формата вернёт сериализатор.
+        data = request.data
+        email = data.get('email') if isinstance(data, Mapping) else None
+        if not email or not isinstance(email, str):
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': email.strip().lower()}
+
+
+class PasswordChangeThrottle(CounterRateThrottle):
+    """Ограничение повторных проверок текущего пароля."""
+
+    scope = 'set_password'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_user_ident(request)}
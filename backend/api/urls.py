@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (AddAndDeleteSubscribe, AddDeleteFavoriteRecipe,
                     AddDeleteShoppingCart, AuthToken,
+                    BatchFavoriteRecipe, BatchShoppingCart,
                     IngredientsViewSet, RecipesViewSet,
                     TagsViewSet, UsersViewSet, set_password,
                     download_shopping_cart,
@@ -31,6 +33,14 @@ urlpatterns = [
           'recipes/<int:recipe_id>/shopping_cart/',
           AddDeleteShoppingCart.as_view(),
           name='shopping_cart'),
+     path(
+          'recipes/favorite/',
+          BatchFavoriteRecipe.as_view(),
+          name='batch_favorite_recipe'),
+     path(
+          'recipes/shopping_cart/',
+          BatchShoppingCart.as_view(),
+          name='batch_shopping_cart'),
      path(
          'recipes/download_shopping_cart/',
          download_shopping_cart,
@@ -40,3 +50,18 @@ urlpatterns = [
      path('', include('djoser.urls')),
      path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    urlpatterns = [
+        path('recipes/download_shopping_cart/',
+             async_views.shopping_cart_download,
+             name='download_shopping_cart'),
+        path('recipes/', async_views.recipe_list, name='recipes-list'),
+        path('recipes/<int:pk>/',
+             async_views.recipe_detail, name='recipes-detail'),
+        path('ingredients/',
+             async_views.ingredient_list, name='ingredients-list'),
+        path('tags/', async_views.tag_list, name='tags-list'),
+    ] + urlpatterns
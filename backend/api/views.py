@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
 from django.db.models.aggregates import Count, Sum
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch
 from django.db.models.expressions import Exists, OuterRef, Value
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
@@ -8,7 +10,7 @@ from djoser.views import UserViewSet
 from rest_framework import generics, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import (SAFE_METHODS, AllowAny,
                                         IsAuthenticated,
@@ -16,23 +18,34 @@ from rest_framework.permissions import (SAFE_METHODS, AllowAny,
                                         )
 
 
+from recipes import coverage, feed
 from recipes.models import (FavoriteRecipe, Ingredient,
                             IngredientForRecipe,
-                            Recipe, ShoppingCart,
+                            Recipe, ShoppingCart, ShoppingCartRecipe,
                             Subscribe, Tag,
                             )
+from recipes.units import base_unit, unit_factor
 from .filters import IngredientFilter, RecipeFilter
-from .mixins import GetObjectMixin, PermissionAndPaginationMixin
-from .serializers import (IngredientSerializer, RecipeReadSerializer,
-                          RecipeWriteSerializer, SubscribeSerializer,
+from .mixins import (PermissionAndPaginationMixin, RecipeBatchToggleMixin,
+                     RecipeToggleMixin, ReplicaReadMixin,
+                     )
+from .pagination import (FeedCursorPagination,
+                         RecommendationCursorPagination,
+                         )
+from .serializers import (CookQuerySerializer, IngredientSerializer,
+                          RecipeReadSerializer, RecipeWriteSerializer,
+                          ShoppingCartEntrySerializer, SubscribeSerializer,
                           TagSerializer, TokenSerializer, UserCreateSerializer,
                           UserListSerializer, UserPasswordSerializer,
                           )
+from .throttles import (LoginEmailThrottle, LoginIPThrottle,
+                        PasswordChangeThrottle, ShoppingCartDownloadThrottle,
+                        )
 
 User = get_user_model()
 
 
-class TagsViewSet(PermissionAndPaginationMixin,
+class TagsViewSet(ReplicaReadMixin, PermissionAndPaginationMixin,
                   viewsets.ModelViewSet):
     """Вьюсет тегов."""
 
@@ -40,7 +53,7 @@ class TagsViewSet(PermissionAndPaginationMixin,
     serializer_class = TagSerializer
 
 
-class IngredientsViewSet(PermissionAndPaginationMixin,
+class IngredientsViewSet(ReplicaReadMixin, PermissionAndPaginationMixin,
                          viewsets.ModelViewSet):
     """Вьсет для списка ингредиентов."""
 
@@ -49,12 +62,18 @@ class IngredientsViewSet(PermissionAndPaginationMixin,
     filterset_class = IngredientFilter
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Вьюсет для рецептов."""
 
     queryset = Recipe.objects.all()
     filterset_class = RecipeFilter
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    throttle_scope = 'recipe_write'
+
+    def get_throttles(self):
+        if self.request.method in SAFE_METHODS:
+            return []
+        return super().get_throttles()
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
@@ -71,24 +90,108 @@ class RecipesViewSet(viewsets.ModelViewSet):
                     user=self.request.user,
                     recipe=OuterRef('id')))
         ).select_related('author').prefetch_related(
-            'tags', 'ingredients', 'recipe',
-            'shopping_cart', 'favorite_recipe'
+            'tags', self.get_ingredients_prefetch()
         ) if self.request.user.is_authenticated else Recipe.objects.annotate(
             is_in_shopping_cart=Value(False),
             is_favorited=Value(False),
         ).select_related('author').prefetch_related(
-            'tags', 'ingredients', 'recipe',
-            'shopping_cart', 'favorite_recipe')
+            'tags', self.get_ingredients_prefetch())
+
+    @staticmethod
+    def get_ingredients_prefetch():
+        return Prefetch(
+            'recipe',
+            queryset=IngredientForRecipe.objects.select_related('ingredient'))
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedCursorPagination)
+    def feed(self, request):
+        """Рецепты авторов из подписок пользователя."""
+
+        queryset = feed.filter_feed(
+            self.filter_queryset(self.get_queryset()), request.user)
+        pages = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(pages, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Похожие рецепты из предрассчитанной таблицы соседей."""
+
+        get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        queryset = self.get_queryset().filter(
+            similar_to__recipe_id=pk
+        ).order_by('-similar_to__score', 'id')
+        pages = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(pages, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        pagination_class=RecommendationCursorPagination)
+    def recommendations(self, request):
+        """Рекомендации по избранному пользователя."""
+
+        queryset = self.get_queryset().filter(
+            recommendations__user=request.user
+        ).annotate(recommendation_score=F('recommendations__score'))
+        pages = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(pages, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True,
+        url_path='also-favorited',
+        pagination_class=RecommendationCursorPagination)
+    def also_favorited(self, request, pk=None):
+        """Рецепты, которые добавляют в избранное вместе с этим."""
+
+        get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        queryset = self.get_queryset().filter(
+            co_favorited_with__recipe_id=pk
+        ).annotate(recommendation_score=F('co_favorited_with__score'))
+        pages = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(pages, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def cook(self, request):
+        """Рецепты, которые можно приготовить из имеющихся ингредиентов.
+
+        Сортировка по доле ингредиентов рецепта, которые есть у
+        пользователя, затем по числу совпавших ингредиентов.
+        """
+
+        query = CookQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        ranked = coverage.index.rank(
+            query.validated_data['ingredients'],
+            query.validated_data['min_coverage'])
+        page = self.paginate_queryset(ranked)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page])
+        page = [item for item in page if item[0] in recipes]
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for recipe_id, _, _ in page], many=True)
+        data = serializer.data
+        for item, (_, recipe_coverage, matched) in zip(data, page):
+            item['coverage'] = round(recipe_coverage, 4)
+            item['matched_ingredients'] = matched
+        return self.get_paginated_response(data)
+
 
 class AddAndDeleteSubscribe(generics.RetrieveDestroyAPIView,
                             generics.ListCreateAPIView):
     """Подписка и отписка от пользователя."""
 
     serializer_class = SubscribeSerializer
+    throttle_scope = 'toggle'
 
     def get_queryset(self):
         return self.request.user.follower.select_related(
@@ -105,53 +208,96 @@ class AddAndDeleteSubscribe(generics.RetrieveDestroyAPIView,
         self.check_object_permissions(self.request, user)
         return user
 
+    def error_response(self, message):
+        if not User.objects.filter(id=self.kwargs['user_id']).exists():
+            return Response(
+                {'errors': 'Пользователь не найден!'},
+                status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {'errors': message},
+            status=status.HTTP_400_BAD_REQUEST)
+
     def create(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if request.user.id == instance.id:
+        author_id = self.kwargs['user_id']
+        if request.user.id == author_id:
             return Response(
                 {'errors': 'На самого себя не подписаться!'},
                 status=status.HTTP_400_BAD_REQUEST)
-        if request.user.follower.filter(author=instance).exists():
-            return Response(
-                {'errors': 'Уже подписан!'},
-                status=status.HTTP_400_BAD_REQUEST)
-        subs = request.user.follower.create(author=instance)
+        try:
+            with transaction.atomic():
+                subs = request.user.follower.create(author_id=author_id)
+        except IntegrityError:
+            return self.error_response('Уже подписан!')
         serializer = self.get_serializer(subs)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def perform_destroy(self, instance):
-        self.request.user.follower.filter(author=instance).delete()
+    def destroy(self, request, *args, **kwargs):
+        deleted, _ = request.user.follower.filter(
+            author_id=self.kwargs['user_id']).delete()
+        if not deleted:
+            return self.error_response('Не подписан!')
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class AddDeleteShoppingCart(GetObjectMixin,
+class AddDeleteShoppingCart(RecipeToggleMixin,
                             generics.RetrieveDestroyAPIView,
                             generics.ListCreateAPIView):
     """Добавление и удаление рецепта в список покупок."""
 
-    def create(self, request, *args, **kwargs):
-        instance = self.get_object()
-        request.user.shopping_cart.recipe.add(instance)
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    list_model = ShoppingCart
+    already_added_message = 'Рецепт уже в списке покупок!'
+    not_added_message = 'Рецепта нет в списке покупок!'
+
+    def get_entry_fields(self, request, partial=True):
+        serializer = ShoppingCartEntrySerializer(
+            data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def patch(self, request, *args, **kwargs):
+        """Изменить множитель порций рецепта в списке покупок."""
+        updated = ShoppingCartRecipe.objects.filter(
+            shopping_cart__user=request.user,
+            recipe_id=self.kwargs['recipe_id'],
+        ).update(**self.get_entry_fields(request, partial=False))
+        if not updated:
+            return self.error_response(self.not_added_message)
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
+
 
-    def perform_destroy(self, instance):
-        self.request.user.shopping_cart.recipe.remove(instance)
+class BatchShoppingCart(RecipeBatchToggleMixin, generics.GenericAPIView):
+    """Пакетное добавление и удаление рецептов в список покупок."""
+
+    list_model = ShoppingCart
+
+    def post(self, request, *args, **kwargs):
+        return self.create(request, *args, **kwargs)
+
+    def delete(self, request, *args, **kwargs):
+        return self.destroy(request, *args, **kwargs)
 
 
 @api_view(['GET'])
+@throttle_classes((ShoppingCartDownloadThrottle,))
 def download_shopping_cart(request):
     """Скачать список покупок."""
 
     ingredient_list = "Cписок покупок:"
-    ingredients = IngredientForRecipe.objects.filter(
-        recipe__shopping_cart__user=request.user
-    ).order_by('ingredient__name').values(
-        'ingredient__name', 'ingredient__measurement_unit'
-    ).annotate(amount=Sum('amount'))
+    unit_field = 'recipe__recipe__ingredient__measurement_unit'
+    ingredients = ShoppingCartRecipe.objects.filter(
+        shopping_cart__user=request.user
+    ).values(
+        name=F('recipe__recipe__ingredient__name'),
+        unit=base_unit(unit_field),
+    ).annotate(amount=Sum(
+        F('recipe__recipe__amount') * F('servings')
+        * unit_factor(unit_field))
+    ).order_by('name', 'unit')
     for ingredient in ingredients:
         ingredient_list += (
-            f"\n{ingredient['ingredient__name']} "
-            f"({ingredient['ingredient__measurement_unit']}) - "
+            f"\n{ingredient['name']} "
+            f"({ingredient['unit']}) - "
             f"{ingredient['amount']}")
 
     file = 'shopping_list'
@@ -161,19 +307,26 @@ def download_shopping_cart(request):
     return response
 
 
-class AddDeleteFavoriteRecipe(GetObjectMixin,
+class AddDeleteFavoriteRecipe(RecipeToggleMixin,
                               generics.RetrieveDestroyAPIView,
                               generics.ListCreateAPIView):
     """Добавление и удаление рецепта в/из избранных."""
 
-    def create(self, request, *args, **kwargs):
-        instance = self.get_object()
-        request.user.favorite_recipe.recipe.add(instance)
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    list_model = FavoriteRecipe
+    already_added_message = 'Рецепт уже в избранном!'
+    not_added_message = 'Рецепта нет в избранном!'
+
+
+class BatchFavoriteRecipe(RecipeBatchToggleMixin, generics.GenericAPIView):
+    """Пакетное добавление и удаление рецептов в/из избранных."""
+
+    list_model = FavoriteRecipe
+
+    def post(self, request, *args, **kwargs):
+        return self.create(request, *args, **kwargs)
 
-    def perform_destroy(self, instance):
-        self.request.user.favorite_recipe.recipe.remove(instance)
+    def delete(self, request, *args, **kwargs):
+        return self.destroy(request, *args, **kwargs)
 
 
 class AuthToken(ObtainAuthToken):
@@ -181,6 +334,7 @@ class AuthToken(ObtainAuthToken):
 
     serializer_class = TokenSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -192,7 +346,7 @@ class AuthToken(ObtainAuthToken):
             status=status.HTTP_201_CREATED)
 
 
-class UsersViewSet(UserViewSet):
+class UsersViewSet(ReplicaReadMixin, UserViewSet):
     """Вьсет для пользователей."""
 
     serializer_class = UserListSerializer
@@ -214,7 +368,7 @@ class UsersViewSet(UserViewSet):
         return UserListSerializer
 
     def perform_create(self, serializer):
-        password = make_password(self.request.data['password'])
+        password = make_password(serializer.validated_data['password'])
         serializer.save(password=password)
 
     @action(
@@ -233,6 +387,7 @@ class UsersViewSet(UserViewSet):
 
 
 @api_view(['post'])
+@throttle_classes((PasswordChangeThrottle,))
 def set_password(request):
     """Изменить пароль."""
 
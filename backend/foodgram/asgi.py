@@ -0,0 +1,22 @@
+"""
+ASGI config for foodgram project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
+
+# URLconf (а с ним вьюхи и сериализаторы) импортируется при загрузке
+# модуля, а не на первом запросе воркера.
+get_resolver().url_patterns
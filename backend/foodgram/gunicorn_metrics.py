@@ -0,0 +1,188 @@
+"""Метрики воркеров gunicorn: число запросов, гистограмма задержек и RSS.
+
+Воркер копит счётчики в памяти, а фоновый поток раз в секунду сбрасывает
+изменения в файл ``<pid>.json`` общего каталога. Мастер отдаёт сводку по
+живым воркерам в текстовом формате Prometheus на локальном адресе
+``GUNICORN_METRICS_BIND``. Функции подключаются хуками в gunicorn.conf.py.
+"""
+import json
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Верхние границы корзин гистограммы задержек, секунды.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FLUSH_INTERVAL = 1
+
+directory = None
+metrics = None
+exits = 0
+
+
+def rss(pid):
+    """Текущий RSS процесса в байтах или None без /proc."""
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+class WorkerMetrics:
+    """Счётчики одного воркера; потокобезопасны для gthread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.duration = 0.0
+        self.dirty = True
+
+    def observe(self, seconds, status):
+        status = f'{status // 100}xx'
+        with self.lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.buckets[bisect_left(BUCKETS, seconds)] += 1
+            self.duration += seconds
+            self.dirty = True
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            snapshot = json.dumps({
+                'requests': self.requests,
+                'buckets': self.buckets,
+                'duration': self.duration,
+                # ru_maxrss в килобайтах (Linux); запасной вариант без /proc.
+                'max_rss': resource.getrusage(
+                    resource.RUSAGE_SELF).ru_maxrss * 1024,
+            })
+            self.dirty = False
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as file:
+            file.write(snapshot)
+        os.replace(temporary, self.path)
+
+    def run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+
+def worker_path(pid):
+    return os.path.join(directory, f'{pid}.json')
+
+
+def read_worker(pid):
+    try:
+        with open(worker_path(pid)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {'requests': {}, 'buckets': [0] * (len(BUCKETS) + 1),
+                'duration': 0.0, 'max_rss': 0}
+
+
+def render(arbiter):
+    """Сводка по живым воркерам в текстовом формате Prometheus."""
+    lines = [
+        '# TYPE gunicorn_workers gauge',
+        f'gunicorn_workers {len(arbiter.WORKERS)}',
+        '# TYPE gunicorn_worker_exits_total counter',
+        f'gunicorn_worker_exits_total {exits}',
+        '# TYPE gunicorn_worker_requests_total counter',
+        '# TYPE gunicorn_worker_request_duration_seconds histogram',
+        '# TYPE gunicorn_worker_rss_bytes gauge',
+    ]
+    for pid in sorted(list(arbiter.WORKERS)):
+        worker = read_worker(pid)
+        label = f'pid="{pid}"'
+        for status, count in sorted(worker['requests'].items()):
+            lines.append(
+                f'gunicorn_worker_requests_total'
+                f'{{{label},status="{status}"}} {count}')
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), worker['buckets']):
+            cumulative += count
+            lines.append(
+                f'gunicorn_worker_request_duration_seconds_bucket'
+                f'{{{label},le="{bound}"}} {cumulative}')
+        lines.append(
+            f'gunicorn_worker_request_duration_seconds_sum{{{label}}} '
+            f'{worker["duration"]:.6f}')
+        lines.append(
+            f'gunicorn_worker_request_duration_seconds_count{{{label}}} '
+            f'{cumulative}')
+        lines.append(
+            f'gunicorn_worker_rss_bytes{{{label}}} '
+            f'{rss(pid) or worker["max_rss"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def serve(arbiter, bind):
+    host, _, port = bind.rpartition(':')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render(arbiter).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    arbiter.log.info('Metrics: http://%s/', bind)
+
+
+def when_ready(arbiter):
+    global directory
+    if directory is not None:
+        return
+    directory = tempfile.mkdtemp(prefix='gunicorn-metrics-')
+    bind = os.getenv('GUNICORN_METRICS_BIND', default='127.0.0.1:9191')
+    if bind:
+        serve(arbiter, bind)
+
+
+def post_fork(arbiter, worker):
+    global metrics
+    metrics = WorkerMetrics(worker_path(os.getpid()))
+    threading.Thread(target=metrics.run, daemon=True).start()
+
+
+def pre_request(worker, request):
+    request.metrics_start = time.monotonic()
+
+
+def post_request(worker, request, environ, response):
+    start = getattr(request, 'metrics_start', None)
+    if metrics is None or start is None:
+        return
+    metrics.observe(
+        time.monotonic() - start, getattr(response, 'status_code', 0) or 0)
+
+
+def child_exit(arbiter, worker):
+    global exits
+    exits += 1
+    for path in (worker_path(worker.pid), worker_path(worker.pid) + '.tmp'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def on_exit(arbiter):
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
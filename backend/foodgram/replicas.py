@@ -0,0 +1,118 @@
+"""Чтение с реплик базы данных.
+
+Реплики задаются переменными DB_REPLICA_HOSTS / DB_REPLICA_NAMES и
+попадают в settings.DATABASE_REPLICAS. Роутер отправляет чтения на
+реплику только после start_replica_reads() или внутри use_replica(): их
+включают вьюхи со списками
+рецептов, ингредиентов, тэгов и пользователей для безопасных запросов.
+Все записи и остальные чтения идут в default.
+
+После успешного небезопасного запроса пользователь на
+DB_REPLICA_PIN_SECONDS закрепляется за основной базой, чтобы видеть
+свои изменения, даже если реплика ещё отстаёт. Закрепление проверяется
+в кэше default на каждом безопасном чтении, поэтому с репликами нужен
+кэш не в базе (memcached): таблица DatabaseCache всегда читается из
+основной базы, и каждое чтение с реплики стоило бы запроса к ней (см.
+проверку recipes.W003). Без реплик закрепление не проверяется.
+"""
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+PIN_KEY = 'db:pinned:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica = ContextVar('replica', default=None)
+
+
+def is_pinned(user):
+    # Без реплик все чтения и так идут в основную базу.
+    return bool(
+        settings.DATABASE_REPLICAS
+        and user.is_authenticated
+        and cache.get(PIN_KEY.format(user.id)) is not None)
+
+
+def pin(user):
+    cache.set(PIN_KEY.format(user.id), 1, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def start_replica_reads(enabled=True):
+    """Направить дальнейшие чтения на одну из реплик.
+
+    Возвращает токен для stop_replica_reads.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    return _replica.set(
+        random.choice(replicas) if enabled and replicas else None)
+
+
+def stop_replica_reads(token):
+    _replica.reset(token)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Направить чтения внутри блока на одну из реплик."""
+    token = start_replica_reads(enabled)
+    try:
+        yield _replica.get()
+    finally:
+        stop_replica_reads(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'django_cache':
+            return DEFAULT_DB_ALIAS
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def pin_after_write(request, response):
+    if (request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated):
+        pin(request.user)
+
+
+@sync_and_async_middleware
+def pin_primary_middleware(get_response):
+    """Закрепить пользователя за основной базой после записи.
+
+    Поддерживает оба режима, чтобы под ASGI не переводить всю цепочку
+    в один синхронный поток.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            if request.method not in SAFE_METHODS:
+                await sync_to_async(pin_after_write)(request, response)
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            pin_after_write(request, response)
+            return response
+    return middleware
@@ -1,4 +1,5 @@
 import os
+from itertools import zip_longest
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -54,6 +55,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+# Асинхронные вьюхи включаются в foodgram/asgi.py.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='') in ('1', 'true', 'True')
+ASYNC_VIEWS_THREADS = int(os.getenv('ASYNC_VIEWS_THREADS', default=8))
 
 DATABASES = {
     'default': {
@@ -66,10 +72,65 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: списки хостов и/или имён баз через запятую,
+# остальные параметры берутся из default. Подробнее в foodgram/replicas.py.
+DB_REPLICA_HOSTS = [
+    host for host in os.getenv('DB_REPLICA_HOSTS', default='').split(',')
+    if host]
+DB_REPLICA_NAMES = [
+    name for name in os.getenv('DB_REPLICA_NAMES', default='').split(',')
+    if name]
+DATABASE_REPLICAS = []
+for number, (host, name) in enumerate(
+        zip_longest(DB_REPLICA_HOSTS, DB_REPLICA_NAMES), start=1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host or DATABASES['default']['HOST'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['foodgram.replicas.ReplicaRouter']
+if DATABASE_REPLICAS:
+    MIDDLEWARE.append('foodgram.replicas.pin_primary_middleware')
+# Сколько секунд после записи читать из основной базы.
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', default=5))
+
+# Кэш должен быть общим для всех процессов (воркеры gunicorn, drain_outbox,
+# команды импорта): через него они узнают об изменении справочников и
+# индекса подбора, в нём же счётчики ограничений частоты. В docker-compose
+# это memcached. Кэш в памяти процесса по умолчанию годится только для
+# одного процесса (разработка), иначе предупреждает проверка recipes.W001.
+# DatabaseCache общий, но каждая проверка версии справочника в нём —
+# запрос к основной базе.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', default='argon2')
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', default=2))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', default=19456))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', default=1))
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', default=10))
+
+# Первый хешер используется для новых паролей, остальные нужны для
+# проверки старых хешей: при входе они прозрачно перехешируются.
+_PASSWORD_HASHERS = {
+    'argon2': 'users.hashers.TunableArgon2PasswordHasher',
+    'bcrypt': 'users.hashers.TunableBCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -114,6 +175,64 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttles.ScopedCounterThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', default='30/min'),
+        'login_email': os.getenv('THROTTLE_LOGIN_EMAIL', default='10/min'),
+        'set_password': os.getenv('THROTTLE_SET_PASSWORD', default='5/min'),
+        'recipe_write': os.getenv('THROTTLE_RECIPE_WRITE', default='30/min'),
+        'shopping_cart_download': os.getenv('THROTTLE_SHOPPING_CART_DOWNLOAD', default='10/min'),
+        'toggle': os.getenv('THROTTLE_TOGGLE', default='120/min'),
+    },
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitPageNumberPagination',
     'PAGE_SIZE': 5,
 }
+
+# Порог, выше которого пагинаторы берут оценочный count
+# (0 — отключено, по умолчанию всегда считается точный COUNT(*)).
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD', default=0))
+ESTIMATED_COUNT_CACHE_TTL = int(os.getenv('ESTIMATED_COUNT_CACHE_TTL', default=60))
+
+# Лента подписок: с какого числа подписок хранить ленту в таблице
+# (0 — всегда собирать при чтении) и сколько рецептов добавлять разом.
+FEED_TIMELINE_MIN_FOLLOWS = int(os.getenv('FEED_TIMELINE_MIN_FOLLOWS', default=0))
+FEED_TIMELINE_LENGTH = int(os.getenv('FEED_TIMELINE_LENGTH', default=1000))
+
+# Конфигурация полнотекстового поиска PostgreSQL.
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+
+# Сколько похожих рецептов хранить для каждого рецепта.
+SIMILAR_RECIPES_TOP_K = int(os.getenv('SIMILAR_RECIPES_TOP_K', default=20))
+
+# Сколько рекомендаций по избранному хранить на рецепт и на пользователя.
+RECOMMENDATIONS_TOP_K = int(os.getenv('RECOMMENDATIONS_TOP_K', default=50))
+
+# Журнал изменений индекса «что приготовить»: сколько записей догружать
+# по одной и сколько секунд их хранить.
+COVERAGE_LOG_LENGTH = int(os.getenv('COVERAGE_LOG_LENGTH', default=1000))
+COVERAGE_LOG_TIMEOUT = int(os.getenv('COVERAGE_LOG_TIMEOUT', default=3600))
+
+# Outbox побочных эффектов: размер пачки воркера drain_outbox и разбор
+# событий в том же процессе сразу после коммита (без воркера).
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', default=500))
+OUTBOX_SYNC = os.getenv('OUTBOX_SYNC', default='') in ('1', 'true', 'True')
+# После стольких неудачных попыток событие больше не разбирается и ждёт
+# ручного разбора (поля attempts и last_error).
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', default=5))
+
+# Алиас кэша со счётчиками ограничений частоты запросов.
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', default='default')
+
+# orjson или json (стандартная библиотека).
+JSON_BACKEND = os.getenv('JSON_BACKEND', default='orjson')
@@ -0,0 +1,14 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class ReplicaTestRunner(DiscoverRunner):
+    """Создаёт схему и в тестовых репликах.
+
+    Роутер запрещает миграции на репликах (схему туда приносит
+    репликация), поэтому тестовые базы создаются без роутеров.
+    """
+
+    def setup_databases(self, **kwargs):
+        with override_settings(DATABASE_ROUTERS=[]):
+            return super().setup_databases(**kwargs)
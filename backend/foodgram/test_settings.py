@@ -0,0 +1,34 @@
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, MIDDLEWARE
+
+# Тесты идут на двух локальных базах SQLite: replica_1 заменяет реплику
+# для чтения, данные в неё тесты пишут сами. Основная тестовая база —
+# файл, а не общая память: в ней конкурентные записи из потоков ждут
+# блокировку, а не падают с «database table is locked».
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'test_default.sqlite3'),
+        'TEST': {'NAME': os.path.join(BASE_DIR, 'test_default.sqlite3')},
+    },
+    'replica_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'test_replica.sqlite3'),
+    },
+}
+DATABASE_REPLICAS = ['replica_1']
+MIDDLEWARE = MIDDLEWARE + ['foodgram.replicas.pin_primary_middleware']
+
+TEST_RUNNER = 'foodgram.test_runner.ReplicaTestRunner'
+
+# Тесты идут в одном процессе, общий кэш им не нужен.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+SILENCED_SYSTEM_CHECKS = ['recipes.W001', 'recipes.W002']
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -8,9 +8,24 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
 import os
+import sys
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
+# Модули, которые библиотеки лишь пробуют импортировать, можно не
+# загружать в процессе веб-сервера: например, coreapi и его зависимости
+# из djoser (WSGI_SKIP_MODULES=coreapi,coreschema,requests,jinja2).
+# Затрагивает только этот процесс, shell и команды manage.py их видят.
+for module in os.getenv('WSGI_SKIP_MODULES', default='').split(','):
+    if module.strip():
+        sys.modules.setdefault(module.strip(), None)
+
 application = get_wsgi_application()
+
+# URLconf (а с ним вьюхи и сериализаторы) импортируется при загрузке
+# модуля, а не на первом запросе: с gunicorn --preload это делается один
+# раз в мастере, и воркеры делят загруженный код copy-on-write.
+get_resolver().url_patterns
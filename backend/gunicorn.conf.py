@@ -0,0 +1,55 @@
+"""Настройки gunicorn: размер пула воркеров, их перезапуск и метрики."""
+import math
+import os
+
+from foodgram import gunicorn_metrics
+
+
+def cpu_count():
+    """Число CPU, доступных процессу, с учётом квоты cgroup контейнера."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != 'max':
+            count = min(count, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(count, 1)
+
+
+bind = os.getenv('GUNICORN_BIND', default='0.0.0.0:8000')
+# По умолчанию 2 * CPU + 1 синхронных воркеров; при GUNICORN_THREADS > 1
+# воркеры становятся gthread и обслуживают запросы потоками.
+workers = int(os.getenv('GUNICORN_WORKERS', default=cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', default=1))
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS', default='gthread' if threads > 1 else 'sync')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
+
+# Воркер перезапускается после max_requests запросов (плюс случайная
+# добавка до jitter, чтобы воркеры не уходили на перезапуск разом):
+# так ограничивается рост памяти.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', default=1000))
+max_requests_jitter = int(
+    os.getenv('GUNICORN_MAX_REQUESTS_JITTER', default=max_requests // 10))
+
+# Приложение загружается один раз в мастере, воркеры (в том числе
+# перезапущенные по max_requests) делят его память copy-on-write.
+preload_app = os.getenv('GUNICORN_PRELOAD', default='1') == '1'
+
+# Файлы heartbeat воркеров в памяти, а не на overlay-диске контейнера.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+when_ready = gunicorn_metrics.when_ready
+post_fork = gunicorn_metrics.post_fork
+pre_request = gunicorn_metrics.pre_request
+post_request = gunicorn_metrics.post_request
+child_exit = gunicorn_metrics.child_exit
+on_exit = gunicorn_metrics.on_exit
@@ -1,9 +1,12 @@
 from django.contrib import admin
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q
 
+from api.pagination import EstimatedCountPaginator
 from .models import (FavoriteRecipe, Ingredient, IngredientForRecipe, Recipe,
-                     ShoppingCart, Subscribe, Tag)
+                     ShoppingCart, ShoppingCartRecipe, Subscribe, Tag)
 
 EMPTY_MSG = '-пусто-'
+RECIPES_PREVIEW = 5
 
 
 class RecipeIngredientAdmin(admin.StackedInline):
@@ -18,14 +21,39 @@ class RecipeAdmin(admin.ModelAdmin):
         'cooking_time', 'get_tags', 'get_ingredients',
         'pub_date', 'get_favorite_count')
     search_fields = (
-        'name', 'cooking_time',
-        'author__email', 'ingredients__name')
+        'name', 'cooking_time', 'author__email')
     list_filter = ('pub_date', 'tags',)
     inlines = (RecipeIngredientAdmin,)
     empty_value_display = EMPTY_MSG
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=IngredientForRecipe.objects.select_related(
+                    'ingredient'))
+        ).annotate(
+            favorite_count=Count('favorite_recipe'))
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полям рецепта и по ингредиентам через EXISTS."""
+        for bit in search_term.split():
+            condition = Q(Exists(IngredientForRecipe.objects.filter(
+                recipe=OuterRef('pk'),
+                ingredient__name__icontains=bit)))
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__icontains': bit})
+            queryset = queryset.filter(condition)
+        return queryset, False
 
     @admin.display(
-        description='Электронная почта автора')
+        description='Электронная почта автора',
+        ordering='author__email')
     def get_author(self, obj):
         return obj.author.email
 
@@ -37,15 +65,15 @@ class RecipeAdmin(admin.ModelAdmin):
     @admin.display(description=' Ингредиенты ')
     def get_ingredients(self, obj):
         return '\n '.join([
-            f'{item["ingredient__name"]} - {item["amount"]}'
-            f' {item["ingredient__measurement_unit"]}.'
-            for item in obj.recipe.values(
-                'ingredient__name',
-                'amount', 'ingredient__measurement_unit')])
+            f'{item.ingredient.name} - {item.amount}'
+            f' {item.ingredient.measurement_unit}.'
+            for item in obj.recipe.all()])
 
-    @admin.display(description='В избранном')
+    @admin.display(
+        description='В избранном',
+        ordering='favorite_count')
     def get_favorite_count(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorite_count
 
 
 @admin.register(Tag)
@@ -74,8 +102,20 @@ class SubscribeAdmin(admin.ModelAdmin):
     empty_value_display = EMPTY_MSG
 
 
+class RecipeListQuerysetMixin:
+    """Миксин списка избранного/корзины с фиксированным числом запросов."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'user'
+        ).prefetch_related(
+            Prefetch('recipe', queryset=Recipe.objects.only('name'))
+        ).annotate(
+            recipe_count=Count('recipe'))
+
+
 @admin.register(FavoriteRecipe)
-class FavoriteRecipeAdmin(admin.ModelAdmin):
+class FavoriteRecipeAdmin(RecipeListQuerysetMixin, admin.ModelAdmin):
     list_display = (
         'id', 'user', 'get_recipe', 'get_count')
     empty_value_display = EMPTY_MSG
@@ -84,25 +124,34 @@ class FavoriteRecipeAdmin(admin.ModelAdmin):
         description='Рецепты')
     def get_recipe(self, obj):
         return [
-            f'{item["name"]} ' for item in obj.recipe.values('name')[:5]]
+            f'{item.name} ' for item in obj.recipe.all()[:RECIPES_PREVIEW]]
 
     @admin.display(
-        description='В избранных')
+        description='В избранных',
+        ordering='recipe_count')
     def get_count(self, obj):
-        return obj.recipe.count()
+        return obj.recipe_count
+
+
+class ShoppingCartRecipeAdmin(admin.TabularInline):
+    model = ShoppingCartRecipe
+    autocomplete_fields = ('recipe',)
 
 
 @admin.register(ShoppingCart)
-class SoppingCartAdmin(admin.ModelAdmin):
+class SoppingCartAdmin(RecipeListQuerysetMixin, admin.ModelAdmin):
     list_display = (
         'id', 'user', 'get_recipe', 'get_count')
+    inlines = (ShoppingCartRecipeAdmin,)
     empty_value_display = EMPTY_MSG
 
     @admin.display(description='Рецепты')
     def get_recipe(self, obj):
         return [
-            f'{item["name"]} ' for item in obj.recipe.values('name')[:5]]
+            f'{item.name} ' for item in obj.recipe.all()[:RECIPES_PREVIEW]]
 
-    @admin.display(description='В избранных')
+    @admin.display(
+        description='В избранных',
+        ordering='recipe_count')
     def get_count(self, obj):
-        return obj.recipe.count()
+        return obj.recipe_count
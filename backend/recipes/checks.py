@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core import checks
+
+# Кэши, которые живут в памяти одного процесса.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+DATABASE_CACHE = 'django.core.cache.backends.db.DatabaseCache'
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Справочники, индекс подбора и счётчики требуют общего кэша.
+
+    Закреплению за основной базой при репликах нужен кэш не в базе.
+    """
+    errors = []
+    if settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+        errors.append(checks.Warning(
+            'Кэш default не общий для процессов: воркеры не увидят '
+            'изменений справочников и индекса подбора.',
+            hint='Задайте CACHE_BACKEND и CACHE_LOCATION общего кэша в '
+                 'памяти, например memcached (PyMemcacheCache).',
+            id='recipes.W001',
+        ))
+    throttle_cache = settings.CACHES.get(settings.THROTTLE_CACHE, {})
+    if throttle_cache.get('BACKEND') in PROCESS_LOCAL_CACHES:
+        errors.append(checks.Warning(
+            f'Кэш {settings.THROTTLE_CACHE} (THROTTLE_CACHE) не общий для '
+            'процессов: ограничения частоты запросов, в том числе попыток '
+            'входа, будут считаться в каждом воркере отдельно.',
+            hint='Укажите в THROTTLE_CACHE общий кэш.',
+            id='recipes.W002',
+        ))
+    if (settings.DATABASE_REPLICAS
+            and settings.CACHES['default']['BACKEND'] == DATABASE_CACHE):
+        errors.append(checks.Warning(
+            'Закрепление за основной базой хранится в DatabaseCache: '
+            'каждое чтение с реплики будет начинаться с запроса к '
+            'основной базе.',
+            hint='С репликами задайте кэш не в базе, например memcached '
+                 '(PyMemcacheCache).',
+            id='recipes.W003',
+        ))
+    return errors
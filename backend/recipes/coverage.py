@@ -0,0 +1,221 @@
+"""Подбор рецептов по имеющимся ингредиентам.
+
+В памяти процесса хранится инвертированный индекс ингредиент ->
+отсортированный массив id рецептов и число ингредиентов каждого рецепта.
+Изменения IngredientForRecipe через outbox попадают в общий журнал
+в кэше (номер изменения и id рецептов), по которому каждый воркер
+догружает только изменившиеся рецепты; при разрыве журнала индекс
+перечитывается целиком. Индекс читается из основной базы, чтобы не
+закрепить в воркере данные отстающей реплики.
+
+Воркер gthread обслуживает запросы потоками, поэтому структуры индекса
+не меняются на месте: load и patch собирают новый Snapshot, а sync
+публикует его одним присваиванием. rank берёт ссылку на снимок один раз
+и читает согласованные данные без блокировки. Словари снимка разбиты на
+шарды (ShardedMap), и patch копирует только шарды изменённых ключей,
+а не весь индекс.
+"""
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from foodgram.replicas import use_replica
+from . import outbox
+
+SEQUENCE_KEY = 'recipes:coverage:sequence'
+LOG_KEY = 'recipes:coverage:log:{}'
+SHARDS = 1024
+
+
+class ShardedMap:
+    """Неизменяемый словарь с целыми ключами, разбитый на SHARDS шардов.
+
+    updated возвращает новую карту, которая делит с исходной все шарды,
+    кроме содержащих изменённые ключи.
+    """
+
+    __slots__ = ('shards',)
+
+    def __init__(self, data=()):
+        shards = [{} for _ in range(SHARDS)]
+        for key, value in dict(data).items():
+            shards[key % SHARDS][key] = value
+        self.shards = tuple(shards)
+
+    def get(self, key, default=None):
+        return self.shards[key % SHARDS].get(key, default)
+
+    def __getitem__(self, key):
+        return self.shards[key % SHARDS][key]
+
+    def __contains__(self, key):
+        return key in self.shards[key % SHARDS]
+
+    def __len__(self):
+        return sum(map(len, self.shards))
+
+    def updated(self, changes):
+        """Новая карта с изменениями changes; None в значении удаляет ключ."""
+        shards = list(self.shards)
+        copied = set()
+        for key, value in changes.items():
+            number = key % SHARDS
+            if number not in copied:
+                copied.add(number)
+                shards[number] = dict(shards[number])
+            if value is None:
+                shards[number].pop(key, None)
+            else:
+                shards[number][key] = value
+        result = object.__new__(ShardedMap)
+        result.shards = tuple(shards)
+        return result
+
+
+# Неизменяемый снимок индекса: после публикации его карты и массивы
+# никто не меняет.
+Snapshot = namedtuple(
+    'Snapshot', ('recipes_by_ingredient', 'ingredients_by_recipe'))
+
+
+class CoverageIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sequence = None
+        self.snapshot = Snapshot(ShardedMap(), ShardedMap())
+
+    @staticmethod
+    def get_sequence():
+        sequence = cache.get(SEQUENCE_KEY)
+        if sequence is None:
+            cache.add(SEQUENCE_KEY, 0, None)
+            sequence = cache.get(SEQUENCE_KEY, 0)
+        return sequence
+
+    @staticmethod
+    def fetch(recipe_ids=None):
+        from .models import IngredientForRecipe
+
+        rows = IngredientForRecipe.objects.order_by()
+        if recipe_ids is not None:
+            rows = rows.filter(recipe_id__in=recipe_ids)
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in rows.values_list(
+                'recipe_id', 'ingredient_id').iterator():
+            ingredients[recipe_id].append(ingredient_id)
+        return ingredients
+
+    def load(self):
+        """Новый снимок по всем рецептам."""
+        recipes = defaultdict(list)
+        ingredients_by_recipe = {}
+        for recipe_id, ingredient_ids in self.fetch().items():
+            ingredients_by_recipe[recipe_id] = tuple(ingredient_ids)
+            for ingredient_id in ingredient_ids:
+                recipes[ingredient_id].append(recipe_id)
+        return Snapshot(
+            ShardedMap(
+                (ingredient_id, array('l', sorted(recipe_ids)))
+                for ingredient_id, recipe_ids in recipes.items()),
+            ShardedMap(ingredients_by_recipe))
+
+    def patch(self, snapshot, recipe_ids):
+        """Новый снимок: snapshot с перечитанными рецептами recipe_ids.
+
+        Копируются только шарды изменённых ключей и массивы затронутых
+        ингредиентов; snapshot остаётся прежним.
+        """
+        recipes_by_ingredient = {}
+        ingredients_by_recipe = {}
+
+        def recipes(ingredient_id):
+            if ingredient_id not in recipes_by_ingredient:
+                recipes_by_ingredient[ingredient_id] = array(
+                    'l', snapshot.recipes_by_ingredient.get(ingredient_id, ()))
+            return recipes_by_ingredient[ingredient_id]
+
+        for recipe_id in recipe_ids:
+            ingredients_by_recipe[recipe_id] = None
+            for ingredient_id in snapshot.ingredients_by_recipe.get(
+                    recipe_id, ()):
+                recipe_list = recipes(ingredient_id)
+                del recipe_list[bisect_left(recipe_list, recipe_id)]
+        for recipe_id, ingredient_ids in self.fetch(recipe_ids).items():
+            ingredients_by_recipe[recipe_id] = tuple(ingredient_ids)
+            for ingredient_id in ingredient_ids:
+                insort(recipes(ingredient_id), recipe_id)
+        return Snapshot(
+            snapshot.recipes_by_ingredient.updated(recipes_by_ingredient),
+            snapshot.ingredients_by_recipe.updated(ingredients_by_recipe))
+
+    def sync(self):
+        sequence = self.get_sequence()
+        if sequence == self.sequence:
+            return
+        with self.lock:
+            if sequence == self.sequence:
+                return
+            changed = None
+            if (self.sequence is not None
+                    and 0 < sequence - self.sequence
+                    <= settings.COVERAGE_LOG_LENGTH):
+                keys = [
+                    LOG_KEY.format(number)
+                    for number in range(self.sequence + 1, sequence + 1)]
+                log = cache.get_many(keys)
+                if len(log) == len(keys):
+                    changed = set().union(*log.values())
+            with use_replica(False):
+                if changed is None:
+                    self.snapshot = self.load()
+                else:
+                    self.snapshot = self.patch(self.snapshot, changed)
+            self.sequence = sequence
+
+    def rank(self, ingredient_ids, min_coverage=0):
+        """Список (recipe_id, coverage, matched), лучшие первыми."""
+        self.sync()
+        snapshot = self.snapshot
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(
+                snapshot.recipes_by_ingredient.get(ingredient_id, ()))
+        result = []
+        for recipe_id, count in matched.items():
+            coverage = count / len(snapshot.ingredients_by_recipe[recipe_id])
+            if coverage >= min_coverage:
+                result.append((recipe_id, coverage, count))
+        result.sort(key=lambda item: (-item[1], -item[2], -item[0]))
+        return result
+
+
+index = CoverageIndex()
+
+
+def publish_changes(recipe_ids):
+    """Записать изменение в журнал и только потом поднять номер.
+
+    Воркер, увидевший номер, находит в журнале все записи до него.
+    Запись занимает первый свободный номер после текущего: cache.add
+    не даёт двум конкурентным публикациям занять один номер.
+    """
+    number = CoverageIndex.get_sequence() + 1
+    while not cache.add(
+            LOG_KEY.format(number), set(recipe_ids),
+            settings.COVERAGE_LOG_TIMEOUT):
+        number += 1
+    try:
+        cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, None)
+        cache.incr(SEQUENCE_KEY)
+
+
+def schedule_update(recipe_ids):
+    """Отметить рецепты изменёнными в фоне."""
+    outbox.emit('coverage', recipe_ids)
@@ -0,0 +1,198 @@
+"""Лента рецептов авторов, на которых подписан пользователь.
+
+По умолчанию лента собирается при чтении (fan-out-on-read) по индексу
+(author, -pub_date). Если FEED_TIMELINE_MIN_FOLLOWS больше нуля, для
+пользователей с таким числом подписок и больше лента хранится в
+TimelineEntry: записи добавляются через outbox при публикации рецепта
+и при подписке. Подписка и отписка снимают отметку FilledTimeline, и до
+её возвращения фоновым заполнением лента снова собирается при чтении.
+Таблица хранит не больше FEED_TIMELINE_LENGTH новейших рецептов
+пользователя, как бы они в неё ни попали.
+"""
+from django.conf import settings
+from django.db.models import Count, F
+
+from . import outbox
+
+
+def timeline_enabled():
+    return settings.FEED_TIMELINE_MIN_FOLLOWS > 0
+
+
+def follows_enough(user_id):
+    from .models import Subscribe
+
+    return (
+        Subscribe.objects.filter(user_id=user_id).count()
+        >= settings.FEED_TIMELINE_MIN_FOLLOWS)
+
+
+def uses_timeline(user):
+    """Читать ли ленту из таблицы: она включена и уже заполнена."""
+    from .models import FilledTimeline
+
+    return (
+        timeline_enabled()
+        and follows_enough(user.id)
+        and FilledTimeline.objects.filter(user=user).exists())
+
+
+def filter_feed(queryset, user):
+    """Рецепты ленты пользователя с датой feed_date для пагинации."""
+    if uses_timeline(user):
+        return queryset.filter(
+            timeline_entries__user=user
+        ).annotate(feed_date=F('timeline_entries__pub_date'))
+    return queryset.filter(
+        author__in=user.follower.values('author')
+    ).annotate(feed_date=F('pub_date'))
+
+
+def timeline_users():
+    from .models import Subscribe
+
+    return Subscribe.objects.order_by().values('user').annotate(
+        follows=Count('id')
+    ).filter(
+        follows__gte=settings.FEED_TIMELINE_MIN_FOLLOWS
+    ).values('user')
+
+
+def trim(user_ids):
+    """Оставить в лентах FEED_TIMELINE_LENGTH новейших записей.
+
+    Лишних записей обычно немного, поэтому старейшие выбираются с конца
+    индекса (user, -pub_date), а удаляются одним запросом.
+    """
+    from .models import TimelineEntry
+
+    length = settings.FEED_TIMELINE_LENGTH
+    overflowing = TimelineEntry.objects.filter(
+        user_id__in=user_ids
+    ).order_by().values('user_id').annotate(
+        entries=Count('id')
+    ).filter(entries__gt=length).values_list('user_id', 'entries')
+    oldest = []
+    for user_id, entries in overflowing:
+        oldest += TimelineEntry.objects.filter(user_id=user_id).order_by(
+            'pub_date', 'recipe_id'
+        ).values_list('id', flat=True)[:entries - length]
+    if oldest:
+        TimelineEntry.objects.filter(id__in=oldest).delete()
+
+
+def schedule_push(recipe_ids):
+    if timeline_enabled():
+        outbox.emit('feed.push', recipe_ids)
+
+
+def push_recipes(recipe_ids):
+    """Добавить рецепты в ленты подписчиков их авторов."""
+    if not timeline_enabled():
+        return
+    from .models import Subscribe, TimelineEntry
+
+    entries = Subscribe.objects.filter(
+        author__recipe__id__in=recipe_ids,
+        user__in=timeline_users(),
+    ).values_list('user_id', 'author__recipe__id', 'author__recipe__pub_date')
+    entries = [
+        TimelineEntry(user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+        for user_id, recipe_id, pub_date in entries]
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    trim({entry.user_id for entry in entries})
+
+
+def add_recipes(user_id, authors):
+    """Заполнить ленту рецептами авторов и отметить её заполненной."""
+    from .models import FilledTimeline, Recipe, TimelineEntry
+
+    recipes = Recipe.objects.filter(
+        author__in=authors
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'pub_date')[:settings.FEED_TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(
+            user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+         for recipe_id, pub_date in recipes],
+        ignore_conflicts=True)
+    trim([user_id])
+    FilledTimeline.objects.get_or_create(user_id=user_id)
+
+
+def fill(user_id):
+    """Заполнить ленту рецептами всех авторов из подписок."""
+    from .models import Subscribe
+
+    add_recipes(
+        user_id, Subscribe.objects.filter(user_id=user_id).values('author'))
+
+
+def clear(user_ids):
+    """Удалить ленты пользователей вместе с отметкой заполнения."""
+    from .models import FilledTimeline, TimelineEntry
+
+    FilledTimeline.objects.filter(user_id__in=user_ids).delete()
+    TimelineEntry.objects.filter(user_id__in=user_ids).delete()
+
+
+def rebuild(user):
+    """Пересобрать ленту пользователя целиком."""
+    clear([user.id])
+    if follows_enough(user.id):
+        fill(user.id)
+
+
+def mark_unfilled(subscription):
+    """Читать ленту при чтении, пока фон не дополнит таблицу."""
+    from .models import FilledTimeline
+
+    FilledTimeline.objects.filter(user_id=subscription.user_id).delete()
+
+
+def schedule_follow(subscription):
+    if timeline_enabled():
+        mark_unfilled(subscription)
+        outbox.emit(
+            'feed.follow', [(subscription.user_id, subscription.author_id)])
+
+
+def schedule_unfollow(subscription):
+    if timeline_enabled():
+        mark_unfilled(subscription)
+        outbox.emit(
+            'feed.unfollow', [(subscription.user_id, subscription.author_id)])
+
+
+def follow_authors(pairs):
+    """Дополнить ленты после подписок (пары user_id, author_id).
+
+    Событие разбирается с задержкой, поэтому при числе подписок не
+    меньше порога добавляются рецепты всех авторов пользователя:
+    повторные записи отбрасываются ограничением уникальности.
+    """
+    if not timeline_enabled():
+        return
+    for user_id in dict.fromkeys(user_id for user_id, _ in pairs):
+        if follows_enough(user_id):
+            fill(user_id)
+
+
+def unfollow_authors(pairs):
+    """Убрать из лент рецепты авторов после отписок.
+
+    Если подписок осталось меньше порога, лента удаляется целиком. Иначе
+    освободившееся место занимают более старые рецепты остальных
+    авторов, как в ленте, собранной при чтении.
+    """
+    if not timeline_enabled():
+        return
+    from .models import TimelineEntry
+
+    for user_id, author_id in pairs:
+        if not follows_enough(user_id):
+            clear([user_id])
+            continue
+        TimelineEntry.objects.filter(
+            user_id=user_id, recipe__author_id=author_id).delete()
+        fill(user_id)
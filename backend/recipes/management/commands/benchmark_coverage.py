@@ -0,0 +1,125 @@
+import random
+import time
+from statistics import median
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from recipes.coverage import CoverageIndex
+from recipes.models import Ingredient, IngredientForRecipe, Recipe
+from users.models import User
+
+
+def orm_rank(ingredient_ids):
+    """Подбор агрегатом по всей связующей таблице, без индекса."""
+    rows = IngredientForRecipe.objects.order_by().values(
+        'recipe_id'
+    ).annotate(
+        total=Count('id'),
+        matched=Count('id', filter=Q(ingredient_id__in=ingredient_ids))
+    ).filter(matched__gt=0).values_list('recipe_id', 'total', 'matched')
+    result = [
+        (recipe_id, matched / total, matched)
+        for recipe_id, total, matched in rows]
+    result.sort(key=lambda item: (-item[1], -item[2], -item[0]))
+    return result
+
+
+class Command(BaseCommand):
+    help = ('Подбор рецептов по ингредиентам: индекс в памяти против '
+            'агрегата по связующей таблице на синтетических данных '
+            '(в откатываемой транзакции)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=135000,
+            help='Рецептов (по умолчанию около миллиона строк в таблице)')
+        parser.add_argument(
+            '--per-recipe', type=int, default=8,
+            help='Ингредиентов в рецепте')
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument(
+            '--pantry', type=int, default=15,
+            help='Ингредиентов в запросе')
+        parser.add_argument(
+            '--changed', type=int, default=10,
+            help='Рецептов в одном изменении журнала')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def timed(self, function, arguments):
+        durations = []
+        for argument in arguments:
+            start = time.perf_counter()
+            function(*argument)
+            durations.append(time.perf_counter() - start)
+        return median(durations) * 1000
+
+    def create_data(self, options):
+        author = User.objects.create(
+            username='coverage-bench', email='coverage-bench@example.com',
+            first_name='Bench', last_name='Bench')
+        Ingredient.objects.bulk_create(
+            (Ingredient(name=f'coverage-bench-{number}',
+                        measurement_unit='г')
+             for number in range(options['ingredients'])),
+            batch_size=1000)
+        ingredient_ids = list(Ingredient.objects.filter(
+            name__startswith='coverage-bench-').values_list('id', flat=True))
+        Recipe.objects.bulk_create(
+            (Recipe(author=author, name='Рецепт', text='Текст',
+                    cooking_time=10)
+             for _ in range(options['recipes'])),
+            batch_size=1000)
+        recipe_ids = list(Recipe.objects.filter(
+            author=author).order_by('id').values_list('id', flat=True))
+        # Популярность ингредиентов убывает как 1/n: соль и мука есть
+        # в каждом втором рецепте, редкие — в единицах.
+        weights = [1 / number for number in range(1, len(ingredient_ids) + 1)]
+        IngredientForRecipe.objects.bulk_create(
+            (IngredientForRecipe(
+                recipe_id=recipe_id, ingredient_id=ingredient_id, amount=1)
+             for recipe_id in recipe_ids
+             for ingredient_id in set(random.choices(
+                 ingredient_ids, weights, k=options['per_recipe']))),
+            batch_size=5000)
+        return ingredient_ids, weights, recipe_ids
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        ingredient_ids, weights, recipe_ids = self.create_data(options)
+        rows = IngredientForRecipe.objects.count()
+        self.stdout.write(
+            f'Рецептов {len(recipe_ids)}, ингредиентов '
+            f'{len(ingredient_ids)}, строк связующей таблицы {rows}.')
+
+        index = CoverageIndex()
+        start = time.perf_counter()
+        index.snapshot = index.load()
+        self.stdout.write(
+            f'Полная загрузка индекса: {time.perf_counter() - start:.1f} с.')
+        index.sync = lambda: None
+
+        pantries = [
+            (random.choices(ingredient_ids, weights, k=options['pantry']),)
+            for _ in range(options['runs'])]
+        for pantry, in pantries[:3]:
+            if index.rank(pantry)[:100] != orm_rank(pantry)[:100]:
+                self.stderr.write('Результаты индекса и агрегата различаются.')
+        self.stdout.write(
+            f'Подбор по {options["pantry"]} ингредиентам, мс: индекс '
+            f'{self.timed(index.rank, pantries):.1f}, агрегат '
+            f'{self.timed(orm_rank, pantries[:3]):.1f}.')
+
+        changes = [
+            (index.snapshot, random.sample(recipe_ids, options['changed']))
+            for _ in range(options['runs'])]
+        self.stdout.write(
+            f'Догрузка {options["changed"]} изменённых рецептов, мс: '
+            f'{self.timed(index.patch, changes):.2f}.')
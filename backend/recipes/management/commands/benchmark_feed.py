@@ -0,0 +1,147 @@
+import random
+import time
+from statistics import median
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.test.utils import override_settings
+
+from recipes import feed
+from recipes.models import Recipe, Subscribe, TimelineEntry
+from users.models import User
+
+PAGE_SIZE = 6
+DEEP_PAGE = 300
+
+
+def read_page(user, before=None):
+    """Страница ленты, собранной при чтении (как во вьюхе feed)."""
+    recipes = Recipe.objects.filter(
+        author__in=user.follower.values('author')
+    ).annotate(feed_date=F('pub_date'))
+    return page(recipes, before)
+
+
+def timeline_page(user, before=None):
+    """Страница материализованной ленты (как во вьюхе feed)."""
+    recipes = Recipe.objects.filter(
+        timeline_entries__user=user
+    ).annotate(feed_date=F('timeline_entries__pub_date'))
+    return page(recipes, before)
+
+
+def page(recipes, before):
+    if before is not None:
+        recipes = recipes.filter(feed_date__lt=before)
+    return list(recipes.order_by('-feed_date', '-id').values_list(
+        'id', 'feed_date')[:PAGE_SIZE])
+
+
+class Command(BaseCommand):
+    help = ('Сравнение ленты, собранной при чтении, и материализованной '
+            'ленты на синтетических данных (в откатываемой транзакции)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=500)
+        parser.add_argument('--authors', type=int, default=200)
+        parser.add_argument(
+            '--follows', type=int, default=50,
+            help='Подписок у каждого читателя')
+        parser.add_argument(
+            '--recipes', type=int, default=50,
+            help='Рецептов у каждого автора')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def timed(self, function, arguments):
+        durations = []
+        for argument in arguments:
+            start = time.perf_counter()
+            function(*argument)
+            durations.append(time.perf_counter() - start)
+        return median(durations) * 1000
+
+    def create_data(self, options):
+        total = options['readers'] + options['authors']
+        User.objects.bulk_create(
+            User(username=f'feed-bench-{number}',
+                 email=f'feed-bench-{number}@example.com',
+                 first_name='Bench', last_name='Bench')
+            for number in range(total))
+        users = list(User.objects.filter(
+            username__startswith='feed-bench-').order_by('id'))
+        authors = users[:options['authors']]
+        readers = users[options['authors']:]
+        # pub_date задаёт auto_now_add: рецепты авторов перемешаны во
+        # времени, как при обычной публикации.
+        recipes = []
+        for _ in range(options['recipes']):
+            random.shuffle(authors)
+            recipes += [
+                Recipe(author=author, name='Рецепт', text='Текст',
+                       cooking_time=10)
+                for author in authors]
+        Recipe.objects.bulk_create(recipes, batch_size=1000)
+        Subscribe.objects.bulk_create(
+            (Subscribe(user=reader, author=author)
+             for reader in readers
+             for author in random.sample(authors, options['follows'])),
+            batch_size=1000)
+        return authors, readers
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic(), override_settings(
+                FEED_TIMELINE_MIN_FOLLOWS=1):
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        authors, readers = self.create_data(options)
+        start = time.perf_counter()
+        for reader in readers:
+            feed.add_recipes(reader.id, reader.follower.values('author'))
+        backfill = time.perf_counter() - start
+        entries = TimelineEntry.objects.count()
+        self.stdout.write(
+            f'Читателей {len(readers)}, авторов {len(authors)}, '
+            f'подписок у читателя {options["follows"]}, рецептов '
+            f'{Recipe.objects.count()}, записей лент {entries}.')
+
+        sample = random.sample(readers, min(options['runs'], len(readers)))
+        for reader in sample:
+            if read_page(reader) != timeline_page(reader):
+                self.stderr.write(f'Ленты читателя {reader.id} различаются.')
+        self.stdout.write('Страница ленты, мс (при чтении / из таблицы):')
+        first = [(reader,) for reader in sample]
+        self.stdout.write(
+            f'  первая: {self.timed(read_page, first):.2f}'
+            f' / {self.timed(timeline_page, first):.2f}')
+        deep = [
+            (reader, TimelineEntry.objects.filter(user=reader).order_by(
+                '-pub_date').values_list('pub_date', flat=True)[DEEP_PAGE])
+            for reader in sample]
+        self.stdout.write(
+            f'  после {DEEP_PAGE} записей: '
+            f'{self.timed(read_page, deep):.2f}'
+            f' / {self.timed(timeline_page, deep):.2f}')
+
+        self.stdout.write(
+            f'Заполнение лент: {backfill:.1f} с, '
+            f'{entries / len(readers):.0f} строк на читателя.')
+        author = max(authors, key=lambda author: author.following.count())
+        published = []
+        for _ in range(options['runs']):
+            published.append(Recipe.objects.create(
+                author=author, name='Рецепт', text='Текст',
+                cooking_time=10).id)
+        push = self.timed(
+            feed.push_recipes, [([recipe_id],) for recipe_id in published])
+        # Ленты полны: каждая новая запись вытесняет старейшую.
+        pushed = TimelineEntry.objects.filter(
+            recipe_id__in=published).count() // len(published)
+        self.stdout.write(
+            f'Публикация рецепта автора с {author.following.count()} '
+            f'подписчиками: при чтении записей нет, в таблицу {pushed} '
+            f'записей за {push:.2f} мс.')
@@ -0,0 +1,74 @@
+import random
+import time
+from statistics import median
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.utils.module_loading import import_string
+
+from api.throttles import LoginEmailThrottle
+
+User = get_user_model()
+
+PASSWORD = 'correct-horse-battery-staple'
+
+
+def cpu_ms(function, runs):
+    """Медиана процессорного времени вызова, мс."""
+    durations = []
+    for _ in range(runs):
+        start = time.process_time()
+        function()
+        durations.append(time.process_time() - start)
+    return median(durations) * 1000
+
+
+class Command(BaseCommand):
+    help = ('Процессорное время проверки пароля хешерами из '
+            'PASSWORD_HASHERS и попытки входа до и после срабатывания '
+            'ограничения частоты (в откатываемой транзакции)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        self.stdout.write('Проверка пароля, мс процессорного времени:')
+        for path in settings.PASSWORD_HASHERS:
+            hasher = import_string(path)()
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+            verify = cpu_ms(lambda: hasher.verify(PASSWORD, encoded), runs)
+            self.stdout.write(f'  {hasher.algorithm}: {verify:.1f}')
+        with transaction.atomic():
+            self.login(runs)
+            transaction.set_rollback(True)
+
+    def login(self, runs):
+        suffix = uuid4().hex[:8]
+        email = f'login-bench-{suffix}@example.com'
+        User.objects.create_user(
+            email=email, username=f'login-bench-{suffix}',
+            first_name='Bench', last_name='Bench', password=PASSWORD)
+        # Свой IP на запуск: счётчик по IP не мешает повторным запускам.
+        client = Client(REMOTE_ADDR='10.{}.{}.{}'.format(
+            *random.choices(range(1, 255), k=3)))
+        limit = LoginEmailThrottle().num_requests
+        statuses = []
+
+        def attempt():
+            statuses.append(client.post(
+                '/api/auth/token/login/',
+                {'email': email, 'password': 'wrong'},
+                content_type='application/json').status_code)
+
+        checked = cpu_ms(attempt, limit)
+        rejected = cpu_ms(attempt, runs)
+        self.stdout.write(
+            f'Неверный пароль, мс процессорного времени на запрос: '
+            f'{checked:.1f} до лимита ({limit} запросов, статусы '
+            f'{sorted(set(statuses[:limit]))}), {rejected:.1f} после '
+            f'(статусы {sorted(set(statuses[limit:]))}).')
@@ -0,0 +1,129 @@
+import csv
+import io
+import random
+import time
+from statistics import median
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import IngredientSerializer, RecipeReadSerializer
+from api.views import RecipesViewSet
+from recipes.models import Ingredient, IngredientForRecipe, Recipe, Tag
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Время рендера и разбора JSON: JSONRenderer/JSONParser против '
+            'FastJSONRenderer/FastJSONParser на полном списке '
+            'ингредиентов и странице рецептов (в откатываемой транзакции)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=100,
+            help='Рецептов на странице')
+        parser.add_argument(
+            '--ingredients', type=int, default=10,
+            help='Ингредиентов в рецепте')
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def timed(self, function, argument):
+        durations = []
+        for _ in range(self.runs):
+            start = time.perf_counter()
+            function(argument)
+            durations.append(time.perf_counter() - start)
+        return median(durations) * 1000
+
+    def create_ingredients(self):
+        with open('./data/ingredients.csv', newline='',
+                  encoding='utf-8') as source:
+            rows = list(csv.reader(source))
+        Ingredient.objects.bulk_create(
+            Ingredient(
+                name=f'render-bench-{name}', measurement_unit=unit,
+                kcal=round(random.uniform(0, 9), 2),
+                protein=round(random.uniform(0, 0.3), 3),
+                fat=round(random.uniform(0, 1), 3),
+                carbs=round(random.uniform(0, 0.8), 3))
+            for name, unit, *_ in rows)
+        return list(Ingredient.objects.filter(
+            name__startswith='render-bench-').order_by('name'))
+
+    def create_page(self, ingredients, options):
+        author = User.objects.create(
+            username='render-bench', email='render-bench@example.com',
+            first_name='Bench', last_name='Bench')
+        tags = [
+            Tag.objects.create(
+                name=f'render-bench-{number}', color=f'#{number:06X}',
+                slug=f'render-bench-{number}')
+            for number in range(3)]
+        recipes = [
+            Recipe.objects.create(
+                author=author, name='Рецепт', text='Текст ' * 50,
+                cooking_time=random.randint(1, 120))
+            for _ in range(options['recipes'])]
+        for recipe in recipes:
+            recipe.tags.set(tags)
+        IngredientForRecipe.objects.bulk_create(
+            IngredientForRecipe(recipe=recipe, ingredient=ingredient,
+                                amount=random.randint(1, 500))
+            for recipe in recipes
+            for ingredient in random.sample(
+                ingredients, options['ingredients']))
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = author
+        view = RecipesViewSet(request=request, format_kwarg=None)
+        queryset = view.get_queryset().filter(
+            id__in=[recipe.id for recipe in recipes])
+        return {
+            'count': len(recipes), 'next': None, 'previous': None,
+            'results': RecipeReadSerializer(
+                queryset, many=True, context={'request': request}).data}
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson не установлен.')
+        random.seed(options['seed'])
+        self.runs = options['runs']
+        with transaction.atomic(), override_settings(JSON_BACKEND='orjson'):
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        ingredients = self.create_ingredients()
+        cases = (
+            (f'список ингредиентов ({len(ingredients)})',
+             IngredientSerializer(ingredients, many=True).data),
+            (f'страница рецептов ({options["recipes"]})',
+             self.create_page(ingredients, options)),
+        )
+        self.stdout.write(
+            'Мс, стандартный / orjson (рендер, затем разбор):')
+        for label, data in cases:
+            rendered = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != rendered:
+                self.stderr.write(f'{label}: вывод рендереров различается.')
+            render = (
+                self.timed(JSONRenderer().render, data),
+                self.timed(FastJSONRenderer().render, data))
+            parse = (
+                self.timed(
+                    lambda body: JSONParser().parse(io.BytesIO(body)),
+                    rendered),
+                self.timed(
+                    lambda body: FastJSONParser().parse(io.BytesIO(body)),
+                    rendered))
+            self.stdout.write(
+                f'  {label}, {len(rendered) // 1024} КБ: рендер '
+                f'{render[0]:.2f} / {render[1]:.2f}, разбор '
+                f'{parse[0]:.2f} / {parse[1]:.2f}')
@@ -0,0 +1,110 @@
+import random
+import time
+from statistics import median
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeReadSerializer
+from api.views import RecipesViewSet
+from recipes.models import Ingredient, IngredientForRecipe, Recipe, Tag
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Время сериализации страницы рецептов: RecipeListSerializer '
+            'против вложенных сериализаторов DRF на каждую строку '
+            '(в откатываемой транзакции)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument(
+            '--ingredients', type=int, default=10,
+            help='Ингредиентов в рецепте')
+        parser.add_argument(
+            '--tags', type=int, default=3, help='Тегов у рецепта')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def timed(self, function):
+        durations = []
+        for _ in range(self.runs):
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+        return median(durations) * 1000
+
+    def create_data(self, options):
+        author = User.objects.create(
+            username='serializer-bench',
+            email='serializer-bench@example.com',
+            first_name='Bench', last_name='Bench')
+        tags = [
+            Tag.objects.create(
+                name=f'serializer-bench-{number}',
+                color=f'#{number:06X}', slug=f'serializer-bench-{number}')
+            for number in range(options['tags'] * 2)]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'serializer-bench-{number}',
+                       measurement_unit='г')
+            for number in range(options['ingredients'] * 5))
+        ingredients = list(Ingredient.objects.filter(
+            name__startswith='serializer-bench-'))
+        recipes = [
+            Recipe.objects.create(
+                author=author, name='Рецепт', text='Текст ' * 50,
+                cooking_time=10)
+            for _ in range(options['recipes'])]
+        for recipe in recipes:
+            recipe.tags.set(random.sample(tags, options['tags']))
+        IngredientForRecipe.objects.bulk_create(
+            IngredientForRecipe(recipe=recipe, ingredient=ingredient,
+                                amount=random.randint(1, 500))
+            for recipe in recipes
+            for ingredient in random.sample(
+                ingredients, options['ingredients']))
+        return author, [recipe.id for recipe in recipes]
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.runs = options['runs']
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        author, recipe_ids = self.create_data(options)
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = author
+        view = RecipesViewSet(request=request, format_kwarg=None)
+        queryset = view.get_queryset().filter(id__in=recipe_ids)
+        context = {'request': request}
+        recipes = list(queryset)
+
+        def fast():
+            return RecipeReadSerializer(
+                recipes, many=True, context=context).data
+
+        def nested():
+            return ListSerializer(
+                recipes, child=RecipeReadSerializer(),
+                context=context).data
+
+        if JSONRenderer().render(fast()) != JSONRenderer().render(nested()):
+            self.stderr.write('Вывод сериализаторов различается.')
+        sql = self.timed(lambda: list(queryset.all()))
+        scale = 100 / len(recipes)
+        self.stdout.write(
+            f'Рецептов {len(recipes)}, ингредиентов в рецепте '
+            f'{options["ingredients"]}, тегов {options["tags"]}. '
+            f'Мс на 100 рецептов:')
+        self.stdout.write(f'  SQL с prefetch: {sql * scale:.1f}')
+        self.stdout.write(
+            f'  вложенные сериализаторы: '
+            f'{self.timed(nested) * scale:.1f}')
+        self.stdout.write(
+            f'  RecipeListSerializer: {self.timed(fast) * scale:.1f}')
@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from recipes import similar
+from recipes.models import SimilarRecipeQueue
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт похожих рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--changed', action='store_true',
+            help='Пересчитать только рецепты из очереди изменений')
+        parser.add_argument('--top-k', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queue = SimilarRecipeQueue.objects.all()
+        changed_ids = set(queue.values_list('recipe_id', flat=True))
+        if options['changed'] and not changed_ids:
+            self.stdout.write('Очередь изменений пуста.')
+            return
+        count = similar.refresh(
+            changed_ids if options['changed'] else None,
+            k=options['top_k'],
+            batch_size=options['batch_size'])
+        queue.filter(recipe_id__in=changed_ids).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {count}.'))
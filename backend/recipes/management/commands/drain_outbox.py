@@ -0,0 +1,28 @@
+import time
+
+from django.core.management import BaseCommand
+
+from recipes import outbox
+
+
+class Command(BaseCommand):
+    help = 'Фоновая обработка событий outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда событий нет')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать накопленные события и выйти')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = outbox.drain(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Обработано событий: {processed}.')
+            if options['once']:
+                return
+            if not processed:
+                time.sleep(options['interval'])
@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.models import IngredientForRecipe, Recipe
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка рецептов в JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Файл .jsonl')
+        parser.add_argument(
+            '--images', help='Папка, куда скопировать картинки')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        images_dir = options['images']
+        if images_dir:
+            os.makedirs(images_dir, exist_ok=True)
+        ids = list(Recipe.objects.order_by('id').values_list('id', flat=True))
+        started = time.monotonic()
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8') as output, \
+                ThreadPoolExecutor(options['workers']) as pool:
+            for start in range(0, len(ids), chunk_size):
+                recipes = self.get_chunk(ids[start:start + chunk_size])
+                for recipe in recipes:
+                    output.write(json.dumps(
+                        self.to_row(recipe), ensure_ascii=False) + '\n')
+                if images_dir:
+                    list(pool.map(
+                        lambda recipe: self.copy_image(recipe, images_dir),
+                        recipes))
+                count += len(recipes)
+                self.report(count, started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено рецептов: {count}.'))
+
+    @staticmethod
+    def get_chunk(ids):
+        return list(Recipe.objects.filter(
+            id__in=ids
+        ).order_by('id').select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=IngredientForRecipe.objects.select_related(
+                    'ingredient').order_by('id'))))
+
+    @staticmethod
+    def to_row(recipe):
+        return {
+            'author': recipe.author.email,
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'pub_date': recipe.pub_date.isoformat(),
+            'image': (
+                os.path.basename(recipe.image.name) if recipe.image
+                else None),
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {'name': item.ingredient.name,
+                 'measurement_unit': item.ingredient.measurement_unit,
+                 'amount': item.amount}
+                for item in recipe.recipe.all()],
+        }
+
+    @staticmethod
+    def copy_image(recipe, images_dir):
+        if not recipe.image:
+            return
+        target = os.path.join(
+            images_dir, os.path.basename(recipe.image.name))
+        with default_storage.open(recipe.image.name) as source, \
+                open(target, 'wb') as destination:
+            shutil.copyfileobj(source, destination)
+
+    def report(self, count, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{count} рецептов, {count / elapsed if elapsed else 0:.0f}/с')
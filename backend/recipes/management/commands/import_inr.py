@@ -1,7 +1,9 @@
 import csv
 
 from django.core.management import BaseCommand
+from django.db import transaction
 
+from recipes import nutrition
 from recipes.models import Ingredient
 
 
@@ -13,12 +15,19 @@ class Command(BaseCommand):
         print('Загрузка ингредиентов завершена.')
 
     def import_ingredients(self, file='ingredients.csv'):
+        """Строка файла: название, единица измерения и необязательные
+        калорийность, белки, жиры, углеводы на единицу измерения."""
         print(f'Загрузка {file}...')
         file_path = f'./data/{file}'
-        with open(file_path, newline='', encoding='utf-8') as f:
+        with open(file_path, newline='', encoding='utf-8') as f, \
+                transaction.atomic():
             reader = csv.reader(f)
             for row in reader:
+                name, measurement_unit, *values = row
                 status, created = Ingredient.objects.update_or_create(
-                    name=row[0],
-                    measurement_unit=row[1]
+                    name=name,
+                    measurement_unit=measurement_unit,
+                    defaults={
+                        field: float(value) if value else None
+                        for field, value in zip(nutrition.FIELDS, values)}
                 )
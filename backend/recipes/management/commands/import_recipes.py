@@ -0,0 +1,175 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from recipes import coverage, feed, nutrition, registry, search, similar
+from recipes.models import Ingredient, IngredientForRecipe, Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Загрузка рецептов из JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл .jsonl')
+        parser.add_argument(
+            '--images', help='Папка с картинками рецептов')
+        parser.add_argument(
+            '--author', help='Email автора для неизвестных авторов')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        self.images_dir = options['images']
+        self.default_author = None
+        if options['author']:
+            self.default_author = User.objects.filter(
+                email=options['author']).first()
+            if self.default_author is None:
+                raise CommandError(f'Нет пользователя {options["author"]}')
+        self.tags = {
+            slug: tag_ids[0]
+            for slug, tag_ids in registry.get_tag_ids_by_slug().items()}
+        self.ingredients = {
+            (name, measurement_unit): ingredient_id
+            for ingredient_id, (name, measurement_unit)
+            in registry.get_ingredients().items()}
+        self.image_field = Recipe._meta.get_field('image')
+        started = time.monotonic()
+        count = 0
+        with open(options['input'], encoding='utf-8') as source, \
+                ThreadPoolExecutor(options['workers']) as self.pool:
+            rows = (json.loads(line) for line in source if line.strip())
+            while True:
+                chunk = list(islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+                # Картинки пишутся в хранилище до коммита; если пачка
+                # откатывается, они удаляются.
+                self.saved_images = []
+                try:
+                    with transaction.atomic():
+                        count += self.import_chunk(chunk)
+                except BaseException:
+                    for name in self.saved_images:
+                        default_storage.delete(name)
+                    raise
+                self.report(count, started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {count}.'))
+
+    def import_chunk(self, rows):
+        authors = User.objects.in_bulk(
+            {row['author'] for row in rows}, field_name='email')
+        kept, kept_authors = [], []
+        for row in rows:
+            author = authors.get(row['author'], self.default_author)
+            if author is None:
+                self.stderr.write(
+                    f'Пропущен рецепт {row["name"]}: '
+                    f'нет автора {row["author"]}')
+                continue
+            kept.append(row)
+            kept_authors.append(author)
+        self.create_missing_ingredients(rows)
+        images = list(self.pool.map(self.save_image, kept))
+        self.saved_images.extend(name for name in images if name)
+        recipes = [
+            Recipe(
+                author=author,
+                name=row['name'],
+                text=row['text'],
+                cooking_time=row['cooking_time'],
+                image=image)
+            for row, author, image in zip(kept, kept_authors, images)]
+        self.save_recipes(recipes)
+        self.restore_pub_dates(recipes, kept)
+        tag_links, ingredient_links = [], []
+        for recipe, row in zip(recipes, kept):
+            tag_links.extend(
+                Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+                for tag_id in {self.tags[slug] for slug in row['tags']
+                               if slug in self.tags})
+            amounts = {}
+            for item in row['ingredients']:
+                key = (item['name'], item['measurement_unit'])
+                amounts[self.ingredients[key]] = item['amount']
+            ingredient_links.extend(
+                IngredientForRecipe(
+                    recipe=recipe, ingredient_id=ingredient_id,
+                    amount=amount)
+                for ingredient_id, amount in amounts.items())
+        Recipe.tags.through.objects.bulk_create(tag_links)
+        IngredientForRecipe.objects.bulk_create(ingredient_links)
+        recipe_ids = [recipe.id for recipe in recipes]
+        search.schedule_update(recipe_ids)
+        coverage.schedule_update(recipe_ids)
+        similar.schedule_update(recipe_ids)
+        nutrition.schedule_update(recipe_ids)
+        feed.schedule_push(recipe_ids)
+        return len(recipes)
+
+    def create_missing_ingredients(self, rows):
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for row in rows for item in row['ingredients']
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in missing)
+        registry.invalidate_ingredients()
+        self.ingredients.update(
+            ((name, measurement_unit), ingredient_id)
+            for ingredient_id, name, measurement_unit
+            in Ingredient.objects.filter(
+                name__in={name for name, _ in missing}
+            ).values_list('id', 'name', 'measurement_unit'))
+
+    @staticmethod
+    def save_recipes(recipes):
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+
+    @staticmethod
+    def restore_pub_dates(recipes, rows):
+        """Даты публикации из файла.
+
+        pub_date — auto_now_add, поэтому при вставке получает текущее
+        время; bulk_update записывает значения как есть.
+        """
+        dated = []
+        for recipe, row in zip(recipes, rows):
+            pub_date = row.get('pub_date') and parse_datetime(row['pub_date'])
+            if pub_date:
+                recipe.pub_date = pub_date
+                dated.append(recipe)
+        Recipe.objects.bulk_update(dated, ['pub_date'], batch_size=500)
+
+    def save_image(self, row):
+        if not self.images_dir or not row.get('image'):
+            return None
+        path = os.path.join(self.images_dir, row['image'])
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as image:
+            return default_storage.save(
+                self.image_field.generate_filename(None, row['image']),
+                File(image))
+
+    def report(self, count, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{count} рецептов, {count / elapsed if elapsed else 0:.0f}/с')
@@ -1,5 +1,6 @@
 from django.core.management import BaseCommand
 
+from recipes import registry
 from recipes.models import Tag
 
 
@@ -11,4 +12,5 @@ class Command(BaseCommand):
             {'name': 'Обед', 'color': '#c0ed09', 'slug': 'lunch'},
             {'name': 'Ужин', 'color': '#8775D2', 'slug': 'supper'}]
         Tag.objects.bulk_create(Tag(**tag) for tag in data)
+        registry.invalidate_tags()
         self.stdout.write(self.style.SUCCESS('Все тэги загружены!'))
@@ -0,0 +1,141 @@
+import http.client
+import socket
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management import BaseCommand, CommandError
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def trickle(url, method, body, headers, seconds):
+    """Медленный клиент: запрос уходит кусками на протяжении seconds."""
+    target = url.path + (f'?{url.query}' if url.query else '')
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {url.netloc}',
+             'Connection: close', f'Content-Length: {len(body or b"")}']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    raw = '\r\n'.join(lines).encode() + b'\r\n\r\n' + (body or b'')
+    chunks = [raw[start:start + 16] for start in range(0, len(raw), 16)]
+    with socket.create_connection(
+            (url.hostname, url.port or 80), timeout=60) as sock:
+        for chunk in chunks:
+            sock.sendall(chunk)
+            time.sleep(seconds / len(chunks))
+        response = http.client.HTTPResponse(sock)
+        response.begin()
+        response.read()
+        return response.status
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест запущенного сервера для подбора gunicorn.conf.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='+',
+            help='Адреса запросов; клиенты обходят их по кругу')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--method', default='GET')
+        parser.add_argument(
+            '--data', default=None,
+            help='Тело запроса в JSON (например, для POST)')
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность теста, секунды')
+        parser.add_argument(
+            '--token', default=None,
+            help='Токен для заголовка Authorization')
+        parser.add_argument(
+            '--trickle', type=float, default=0,
+            help='Отправлять каждый запрос медленно, за столько секунд')
+
+    def client(self, urls, options, headers, deadline, results):
+        """Один клиент: keep-alive соединение, запросы до deadline."""
+        latencies = []
+        statuses = Counter()
+        connection = None
+        position = 0
+        while time.monotonic() < deadline:
+            url = urls[position % len(urls)]
+            position += 1
+            start = time.monotonic()
+            if options['trickle']:
+                try:
+                    status = trickle(
+                        url, options['method'], options['data'], headers,
+                        options['trickle'])
+                except (OSError, http.client.HTTPException):
+                    statuses['error'] += 1
+                    continue
+                latencies.append(time.monotonic() - start)
+                statuses[str(status)] += 1
+                continue
+            if connection is None:
+                connection = http.client.HTTPConnection(
+                    url.netloc, timeout=60)
+            try:
+                connection.request(
+                    options['method'],
+                    url.path + (f'?{url.query}' if url.query else ''),
+                    body=options['data'], headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = None
+                statuses['error'] += 1
+                continue
+            latencies.append(time.monotonic() - start)
+            statuses[str(response.status)] += 1
+            if response.will_close:
+                connection.close()
+                connection = None
+        results.append((latencies, statuses))
+
+    def handle(self, *args, **options):
+        urls = [urlsplit(url) for url in options['urls']]
+        if any(url.scheme != 'http' for url in urls):
+            raise CommandError('Поддерживаются только адреса http://.')
+        headers = {}
+        if options['data'] is not None:
+            headers['Content-Type'] = 'application/json'
+            options['data'] = options['data'].encode()
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        results = []
+        started = time.monotonic()
+        deadline = started + options['duration']
+        clients = [
+            threading.Thread(
+                target=self.client,
+                args=(urls, options, headers, deadline, results))
+            for _ in range(options['concurrency'])]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.monotonic() - started
+        latencies = []
+        statuses = Counter()
+        for client_latencies, client_statuses in results:
+            latencies.extend(client_latencies)
+            statuses.update(client_statuses)
+        if not latencies:
+            raise CommandError('Ни один запрос не выполнен.')
+        latencies.sort()
+        self.stdout.write(
+            f'Запросов: {len(latencies)} за {elapsed:.1f} с, '
+            f'{len(latencies) / elapsed:.1f} в секунду')
+        quantiles = [
+            f'p{int(fraction * 100)} '
+            f'{percentile(latencies, fraction) * 1000:.1f}'
+            for fraction in (0.5, 0.9, 0.99)]
+        quantiles.append(f'max {latencies[-1] * 1000:.1f}')
+        self.stdout.write('Задержка, мс: ' + ', '.join(quantiles))
+        self.stdout.write('Ответы: ' + ', '.join(
+            f'{status} {count}' for status, count in sorted(
+                statuses.items())))
@@ -0,0 +1,146 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from statistics import median
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# Дочерний процесс повторяет загрузку воркера по фазам (как
+# foodgram.wsgi) и замеряет создание конфигурации, импорт моделей и
+# ready() каждого приложения.
+PROBE = '''
+import json
+import time
+
+from django.apps.config import AppConfig
+
+apps = {}
+phases = {}
+create = AppConfig.create.__func__
+
+
+def timed(label, stage, method):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            apps[label][stage] = time.perf_counter() - start
+    return wrapper
+
+
+def create_timed(cls, entry):
+    start = time.perf_counter()
+    app_config = create(cls, entry)
+    label = app_config.label
+    apps[label] = {'config': time.perf_counter() - start}
+    app_config.import_models = timed(
+        label, 'models', app_config.import_models)
+    app_config.ready = timed(label, 'ready', app_config.ready)
+    return app_config
+
+
+AppConfig.create = classmethod(create_timed)
+start = time.perf_counter()
+
+
+def mark(phase):
+    global start
+    now = time.perf_counter()
+    phases[phase] = now - start
+    start = now
+
+
+from django.conf import settings
+settings.INSTALLED_APPS
+mark('settings')
+import django
+django.setup(set_prefix=False)
+mark('apps')
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+mark('middleware')
+from django.urls import get_resolver
+get_resolver().url_patterns
+mark('urls')
+print(json.dumps({'phases': phases, 'apps': apps}))
+'''
+
+
+def parse_importtime(output):
+    """Строки вывода -X importtime: (собственное, суммарное, модуль)."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        modules.append((int(own) / 10 ** 6, int(cumulative) / 10 ** 6,
+                        name.strip()))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Профиль старта воркера: фазы, приложения и импорты модулей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=1,
+            help='Число холодных запусков; фазы и приложения — медиана')
+        parser.add_argument(
+            '--top', type=int, default=25,
+            help='Сколько модулей и пакетов показать')
+
+    def probe(self):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        return report, parse_importtime(result.stderr)
+
+    def row(self, name, *values):
+        cells = ''.join(f'{value * 1000:10.1f}' for value in values)
+        self.stdout.write(f'  {name:<48}{cells}')
+
+    def handle(self, *args, **options):
+        reports = []
+        for _ in range(max(options['runs'], 1)):
+            report, modules = self.probe()
+            reports.append(report)
+        phases = {
+            phase: median(report['phases'][phase] for report in reports)
+            for phase in reports[0]['phases']}
+        self.stdout.write('Фазы старта, мс:')
+        for phase, seconds in phases.items():
+            self.row(phase, seconds)
+        self.row('всего', sum(phases.values()))
+
+        self.stdout.write('\nПриложения, мс (config, models, ready):')
+        for label in reports[0]['apps']:
+            self.row(label, *(
+                median(report['apps'][label].get(stage, 0)
+                       for report in reports)
+                for stage in ('config', 'models', 'ready')))
+
+        top = options['top']
+        self.stdout.write('\nМодули по суммарному времени импорта, мс:')
+        for own, cumulative, name in sorted(
+                modules, key=lambda module: -module[1])[:top]:
+            self.row(name, cumulative, own)
+
+        packages = defaultdict(float)
+        for own, _, name in modules:
+            packages[name.split('.')[0]] += own
+        self.stdout.write('\nПакеты по собственному времени импорта, мс:')
+        for name, seconds in sorted(
+                packages.items(), key=lambda package: -package[1])[:top]:
+            self.row(name, seconds)
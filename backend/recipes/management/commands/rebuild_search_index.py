@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from recipes import search
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Пересборка поисковых документов рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ids = list(Recipe.objects.values_list('id', flat=True))
+        chunk_size = options['chunk_size']
+        for start in range(0, len(ids), chunk_size):
+            search.update_documents(ids[start:start + chunk_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено документов: {len(ids)}.'))
@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from recipes import feed
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересборка материализованных лент подписок'
+
+    def handle(self, *args, **options):
+        if not feed.timeline_enabled():
+            self.stdout.write('FEED_TIMELINE_MIN_FOLLOWS не задан.')
+            return
+        feed.clear(User.objects.exclude(
+            id__in=feed.timeline_users()).values('id'))
+        users = User.objects.filter(id__in=feed.timeline_users())
+        for user in users.iterator():
+            feed.rebuild(user)
+        self.stdout.write(self.style.SUCCESS('Ленты пересобраны!'))
@@ -0,0 +1,130 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+LIST_MODELS = ('FavoriteRecipe', 'ShoppingCart')
+
+
+def merge_user_lists(apps, schema_editor):
+    """Строки «пользователь — рецепт» в один список на пользователя.
+
+    Списком пользователя становится его первая строка, рецепты всех его
+    строк переносятся в связующую таблицу, остальные строки удаляются.
+    Строки без пользователя не принадлежат ни одному списку и удаляются.
+    """
+    db = schema_editor.connection.alias
+    for model_name in LIST_MODELS:
+        model = apps.get_model('recipes', model_name)
+        through = model._meta.get_field('recipe').remote_field.through
+        list_field = f'{model._meta.model_name}_id'
+        lists = {}
+        # Уникальный индекс связующей таблицы создаётся отложенно, поэтому
+        # повторы рецептов у пользователя убираются здесь.
+        entries = {}
+        for row_id, user_id, recipe_id in model.objects.using(db).exclude(
+                user=None).order_by('user_id', 'id').values_list(
+                'id', 'user_id', 'old_recipe_id').iterator():
+            list_id = lists.setdefault(user_id, row_id)
+            entries.setdefault((list_id, recipe_id), through(
+                **{list_field: list_id, 'recipe_id': recipe_id}))
+        through.objects.using(db).bulk_create(
+            entries.values(), batch_size=1000)
+        model.objects.using(db).exclude(id__in=lists.values()).delete()
+
+
+def split_user_lists(apps, schema_editor):
+    """Обратный перенос: строка «пользователь — рецепт» на каждый рецепт."""
+    db = schema_editor.connection.alias
+    for model_name in LIST_MODELS:
+        model = apps.get_model('recipes', model_name)
+        through = model._meta.get_field('recipe').remote_field.through
+        list_name = model._meta.model_name
+        filled = set()
+        rows = []
+        for list_id, recipe_id, user_id, pub_date in through.objects.using(
+                db).order_by('id').values_list(
+                f'{list_name}_id', 'recipe_id', f'{list_name}__user_id',
+                f'{list_name}__pub_date').iterator():
+            if list_id not in filled:
+                filled.add(list_id)
+                model.objects.using(db).filter(id=list_id).update(
+                    old_recipe_id=recipe_id)
+                continue
+            rows.append(model(
+                user_id=user_id, pub_date=pub_date, old_recipe_id=recipe_id))
+        model.objects.using(db).bulk_create(rows, batch_size=1000)
+        model.objects.using(db).filter(old_recipe=None).delete()
+
+
+class Migration(migrations.Migration):
+    """Избранное и список покупок: один список с рецептами на пользователя.
+
+    Раньше каждая строка FavoriteRecipe и ShoppingCart хранила один
+    рецепт (внешний ключ recipe). Ключ переименовывается в old_recipe,
+    рецепты переносятся в связующие таблицы новых полей recipe, и только
+    после этого старая колонка удаляется, а user становится OneToOne.
+    Миграция обратима.
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0003_subscribe_subscribe_unique_subscription'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='shoppingcart',
+            name='unique_shopping_cart',
+        ),
+        migrations.RenameField(
+            model_name='favoriterecipe',
+            old_name='recipe',
+            new_name='old_recipe',
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='old_recipe',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe'),
+        ),
+        migrations.RenameField(
+            model_name='shoppingcart',
+            old_name='recipe',
+            new_name='old_recipe',
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='old_recipe',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe'),
+        ),
+        migrations.AddField(
+            model_name='favoriterecipe',
+            name='recipe',
+            field=models.ManyToManyField(related_name='favorite_recipe', to='recipes.Recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='recipe',
+            field=models.ManyToManyField(related_name='shopping_cart', to='recipes.Recipe', verbose_name='Покупка'),
+        ),
+        migrations.RunPython(merge_user_lists, split_user_lists),
+        migrations.RemoveField(
+            model_name='favoriterecipe',
+            name='old_recipe',
+        ),
+        migrations.RemoveField(
+            model_name='shoppingcart',
+            name='old_recipe',
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='user',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='favorite_recipe', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='user',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.18 on 2026-10-19 03:05
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Явная связующая модель списка покупок поверх существующей таблицы.
+
+    Таблица recipes_shoppingcart_recipe остаётся прежней: модель
+    переносится только в состоянии миграций, в базу добавляются
+    колонка servings и именованное ограничение уникальности.
+    """
+
+    dependencies = [
+        ('recipes', '0006_recipe_search_document'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ShoppingCartRecipe',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                        ('shopping_cart', models.ForeignKey(db_column='shoppingcart_id', on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='recipes.shoppingcart', verbose_name='Список покупок')),
+                    ],
+                    options={
+                        'verbose_name': 'Рецепт в списке покупок',
+                        'verbose_name_plural': 'Рецепты в списках покупок',
+                        'db_table': 'recipes_shoppingcart_recipe',
+                        'unique_together': {('shopping_cart', 'recipe')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='shoppingcart',
+                    name='recipe',
+                    field=models.ManyToManyField(related_name='shopping_cart', through='recipes.ShoppingCartRecipe', to='recipes.Recipe', verbose_name='Покупка'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='shoppingcartrecipe',
+            name='servings',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1, message='Мин. множитель порций - 1')], verbose_name='Множитель порций'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcartrecipe',
+            constraint=models.UniqueConstraint(fields=('shopping_cart', 'recipe'), name='unique_shopping_cart_recipe'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='shoppingcartrecipe',
+            unique_together=set(),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.18 on 2026-10-19 03:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_similar_recipes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация',
+                'verbose_name_plural': 'Рекомендации',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.CreateModel(
+            name='CoFavoriteRecipe',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Близость')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_favorited_with', to='recipes.recipe', verbose_name='Совместно добавляемый рецепт')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_favorites', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Совместно добавляемый рецепт',
+                'verbose_name_plural': 'Совместно добавляемые рецепты',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userrecommendation',
+            index=models.Index(fields=['user', '-score', 'recipe'], name='user_recommendation_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='userrecommendation',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_user_recommendation'),
+        ),
+        migrations.AddIndex(
+            model_name='cofavoriterecipe',
+            index=models.Index(fields=['recipe', '-score', 'other'], name='co_favorite_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cofavoriterecipe',
+            constraint=models.UniqueConstraint(fields=('recipe', 'other'), name='unique_co_favorite_recipe'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.18 on 2026-10-19 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_favorite_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='carbs',
+            field=models.FloatField(blank=True, null=True, verbose_name='Углеводы на единицу измерения, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='fat',
+            field=models.FloatField(blank=True, null=True, verbose_name='Жиры на единицу измерения, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='kcal',
+            field=models.FloatField(blank=True, null=True, verbose_name='Калорийность на единицу измерения'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='protein',
+            field=models.FloatField(blank=True, null=True, verbose_name='Белки на единицу измерения, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='carbs',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='fat',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='kcal',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Калорийность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='protein',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Белки, г'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:20
+
+from django.db import migrations, models
+from django.db.models import (Count, F, FloatField, OuterRef, Q, Subquery,
+                              Sum)
+
+FIELDS = ('kcal', 'protein', 'fat', 'carbs')
+
+
+def recompute_totals(apps, schema_editor):
+    """Итоги заново: NULL, если значения нет хотя бы у одного ингредиента.
+
+    Раньше такие итоги сохранялись нулём.
+    """
+    db = schema_editor.connection.alias
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientForRecipe = apps.get_model('recipes', 'IngredientForRecipe')
+    totals = IngredientForRecipe.objects.using(db).filter(
+        recipe=OuterRef('pk')).order_by().values('recipe')
+    Recipe.objects.using(db).update(**{
+        field: Subquery(
+            totals.annotate(
+                total=Sum(F('amount') * F(f'ingredient__{field}'),
+                          output_field=FloatField()),
+                unknown=Count(
+                    'pk', filter=Q(**{f'ingredient__{field}': None})),
+            ).filter(unknown=0).values('total'),
+            output_field=FloatField())
+        for field in FIELDS})
+
+
+def unknown_to_zero(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for field in FIELDS:
+        Recipe.objects.using(db).filter(**{field: None}).update(**{field: 0})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_outbox_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='carbs',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Углеводы, г'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='fat',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Жиры, г'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='kcal',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Калорийность'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='protein',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Белки, г'),
+        ),
+        migrations.RunPython(recompute_totals, unknown_to_zero),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0013_nullable_nutrition_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilledTimeline',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Заполненная лента',
+                'verbose_name_plural': 'Заполненные ленты',
+            },
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core import validators
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from . import coverage, feed, nutrition, registry, search, similar
+
 User = get_user_model()
 
 
@@ -34,6 +37,11 @@ class Tag(models.Model):
         return self.name
 
 
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags_registry(sender, **kwargs):
+    registry.invalidate_tags()
+
+
 class Ingredient(models.Model):
     """Модель для ингредиентов."""
 
@@ -45,6 +53,26 @@ class Ingredient(models.Model):
         'Единица измерения ингредиента',
         max_length=200,
     )
+    kcal = models.FloatField(
+        'Калорийность на единицу измерения',
+        null=True,
+        blank=True,
+    )
+    protein = models.FloatField(
+        'Белки на единицу измерения, г',
+        null=True,
+        blank=True,
+    )
+    fat = models.FloatField(
+        'Жиры на единицу измерения, г',
+        null=True,
+        blank=True,
+    )
+    carbs = models.FloatField(
+        'Углеводы на единицу измерения, г',
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         ordering = ['name']
@@ -55,6 +83,11 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}.'
 
 
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients_registry(sender, **kwargs):
+    registry.invalidate_ingredients()
+
+
 class Recipe(models.Model):
     """Модель для рецептов."""
 
@@ -94,16 +127,50 @@ class Recipe(models.Model):
         'Дата публикации',
         auto_now_add=True,
     )
+    kcal = models.FloatField(
+        'Калорийность',
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    protein = models.FloatField(
+        'Белки, г',
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    fat = models.FloatField(
+        'Жиры, г',
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    carbs = models.FloatField(
+        'Углеводы, г',
+        null=True,
+        blank=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx')]
 
     def __str__(self):
         return f'{self.author.email}, {self.name}'
 
 
+@receiver(post_save, sender=Recipe)
+def push_recipe_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        feed.schedule_push([instance.id])
+
+
 class IngredientForRecipe(models.Model):
     """Модель ингридиентов для рецепта."""
 
@@ -134,6 +201,127 @@ class IngredientForRecipe(models.Model):
                 name='unique ingredient')]
 
 
+@receiver(post_save, sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientForRecipe)
+def update_search_document(sender, instance, **kwargs):
+    recipe_id = (
+        instance.recipe_id if sender is IngredientForRecipe else instance.id)
+    search.schedule_update([recipe_id])
+
+
+@receiver((post_save, post_delete), sender=IngredientForRecipe)
+def update_coverage_index(sender, instance, **kwargs):
+    coverage.schedule_update([instance.recipe_id])
+
+
+@receiver((post_save, post_delete), sender=IngredientForRecipe)
+def update_nutrition_totals(sender, instance, **kwargs):
+    nutrition.schedule_update([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_recipes_for_ingredient(sender, instance, created, **kwargs):
+    if not created:
+        recipe_ids = list(
+            instance.ingredient.values_list('recipe_id', flat=True))
+        search.schedule_update(recipe_ids)
+        nutrition.schedule_update(recipe_ids)
+
+
+class RecipeSearchDocument(models.Model):
+    """Поисковый документ рецепта."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        verbose_name='Рецепт',
+    )
+    title = models.CharField(
+        'Название',
+        max_length=250,
+    )
+    ingredients = models.TextField(
+        'Ингредиенты',
+    )
+    text = models.TextField(
+        'Описание',
+    )
+    vector = SearchVectorField(
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Поисковый документ'
+        verbose_name_plural = 'Поисковые документы'
+
+
+class SimilarRecipe(models.Model):
+    """Предрассчитанный похожий рецепт."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField(
+        'Близость',
+    )
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe')]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx')]
+
+
+class SimilarRecipeQueue(models.Model):
+    """Рецепты, похожие на которые нужно пересчитать."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+
+    class Meta:
+        verbose_name = 'Рецепт в очереди пересчёта похожих'
+        verbose_name_plural = 'Очередь пересчёта похожих рецептов'
+
+
+@receiver((post_save, post_delete), sender=IngredientForRecipe)
+def update_similar_recipes(sender, instance, **kwargs):
+    similar.schedule_update([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_similar_recipes_for_tags(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        similar.schedule_update([instance.id])
+    elif pk_set:
+        similar.schedule_update(pk_set)
+
+
 class Subscribe(models.Model):
     """Модель подписок."""
 
@@ -166,6 +354,70 @@ class Subscribe(models.Model):
         return f'Пользователь {self.user} -> автор {self.author}'
 
 
+@receiver(post_save, sender=Subscribe)
+def add_author_to_timeline(sender, instance, created, **kwargs):
+    if created:
+        feed.schedule_follow(instance)
+
+
+@receiver(post_delete, sender=Subscribe)
+def remove_author_from_timeline(sender, instance, **kwargs):
+    feed.schedule_unfollow(instance)
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента рецептов авторов из подписок."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт',
+    )
+    pub_date = models.DateTimeField(
+        'Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_timeline_entry')]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='timeline_user_pub_date_idx')]
+
+
+class FilledTimeline(models.Model):
+    """Отметка о том, что материализованная лента заполнена.
+
+    Снимается при подписке и отписке и ставится заново фоновым
+    заполнением; без неё лента собирается при чтении.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Подписчик',
+    )
+
+    class Meta:
+        verbose_name = 'Заполненная лента'
+        verbose_name_plural = 'Заполненные ленты'
+
+
 class FavoriteRecipe(models.Model):
     """Модель избранных рецептов."""
 
@@ -194,11 +446,71 @@ class FavoriteRecipe(models.Model):
         list_ = [item['name'] for item in self.recipe.values('name')]
         return f'Пользователь {self.user} добавил {list_} в избранные.'
 
-    @receiver(post_save, sender=User)
-    def create_favorite_recipe(
-            sender, instance, created, **kwargs):
-        if created:
-            return FavoriteRecipe.objects.create(user=instance)
+
+class CoFavoriteRecipe(models.Model):
+    """Рецепт, который добавляют в избранное вместе с данным."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='co_favorites',
+        verbose_name='Рецепт',
+    )
+    other = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='co_favorited_with',
+        verbose_name='Совместно добавляемый рецепт',
+    )
+    score = models.FloatField(
+        'Близость',
+    )
+
+    class Meta:
+        verbose_name = 'Совместно добавляемый рецепт'
+        verbose_name_plural = 'Совместно добавляемые рецепты'
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'other'],
+                name='unique_co_favorite_recipe')]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score', 'other'],
+                name='co_favorite_score_idx')]
+
+
+class UserRecommendation(models.Model):
+    """Персональная рекомендация рецепта по избранному."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Рецепт',
+    )
+    score = models.FloatField(
+        'Оценка',
+    )
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_user_recommendation')]
+        indexes = [
+            models.Index(
+                fields=['user', '-score', 'recipe'],
+                name='user_recommendation_score_idx')]
 
 
 class ShoppingCart(models.Model):
@@ -206,6 +518,7 @@ class ShoppingCart(models.Model):
 
     recipe = models.ManyToManyField(
         Recipe,
+        through='ShoppingCartRecipe',
         related_name='shopping_cart',
         verbose_name='Покупка',
     )
@@ -232,8 +545,68 @@ class ShoppingCart(models.Model):
         list_ = [item['name'] for item in self.recipe.values('name')]
         return f'Пользователь {self.user} добавил {list_} в покупки.'
 
-    @receiver(post_save, sender=User)
-    def create_shopping_cart(
-            sender, instance, created, **kwargs):
-        if created:
-            return ShoppingCart.objects.create(user=instance)
+
+class ShoppingCartRecipe(models.Model):
+    """Рецепт в списке покупок с множителем порций."""
+
+    shopping_cart = models.ForeignKey(
+        ShoppingCart,
+        on_delete=models.CASCADE,
+        db_column='shoppingcart_id',
+        related_name='entries',
+        verbose_name='Список покупок',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_entries',
+        verbose_name='Рецепт',
+    )
+    servings = models.PositiveSmallIntegerField(
+        'Множитель порций',
+        default=1,
+        validators=(
+            validators.MinValueValidator(
+                1, message='Мин. множитель порций - 1'),),
+    )
+
+    class Meta:
+        db_table = 'recipes_shoppingcart_recipe'
+        verbose_name = 'Рецепт в списке покупок'
+        verbose_name_plural = 'Рецепты в списках покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shopping_cart', 'recipe'],
+                name='unique_shopping_cart_recipe')]
+
+
+class OutboxEvent(models.Model):
+    """Событие для фоновой обработки побочных эффектов записи."""
+
+    topic = models.CharField(
+        'Тема',
+        max_length=50,
+    )
+    payload = models.JSONField(
+        'Данные',
+    )
+    created = models.DateTimeField(
+        'Дата создания',
+        auto_now_add=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Неудачных попыток',
+        default=0,
+    )
+    last_error = models.TextField(
+        'Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Событие outbox'
+        verbose_name_plural = 'События outbox'
+        ordering = ('id',)
+
+    def __str__(self):
+        return f'{self.topic}: {self.payload}'
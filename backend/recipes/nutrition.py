@@ -0,0 +1,44 @@
+"""Пищевая ценность рецептов.
+
+У ингредиента калорийность и БЖУ указаны на единицу измерения, итог
+рецепта — сумма amount * значение по его ингредиентам. Итоги хранятся в
+индексированных колонках Recipe и пересчитываются одним UPDATE через
+outbox, когда меняются ингредиенты рецепта или их пищевая ценность.
+"""
+from django.db.models import (Count, F, FloatField, OuterRef, Q, Subquery,
+                              Sum)
+
+from . import outbox
+
+FIELDS = ('kcal', 'protein', 'fat', 'carbs')
+
+
+def update_totals(recipe_ids=None):
+    """Пересчитать итоги рецептов recipe_ids или всех рецептов.
+
+    Итог не известен (NULL), если значения нет хотя бы у одного
+    ингредиента рецепта или ингредиентов нет вовсе: нулевой итог
+    проходил бы любой фильтр «не больше».
+    """
+    from .models import IngredientForRecipe, Recipe
+
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(id__in=recipe_ids)
+    totals = IngredientForRecipe.objects.filter(
+        recipe=OuterRef('pk')).order_by().values('recipe')
+    recipes.update(**{
+        field: Subquery(
+            totals.annotate(
+                total=Sum(F('amount') * F(f'ingredient__{field}'),
+                          output_field=FloatField()),
+                unknown=Count(
+                    'pk', filter=Q(**{f'ingredient__{field}': None})),
+            ).filter(unknown=0).values('total'),
+            output_field=FloatField())
+        for field in FIELDS})
+
+
+def schedule_update(recipe_ids):
+    """Пересчитать итоги рецептов в фоне."""
+    outbox.emit('nutrition', recipe_ids)
@@ -0,0 +1,151 @@
+"""Транзакционный outbox для побочных эффектов записи.
+
+Receivers не пересчитывают поиск, индексы и ленты в запросе, а пишут
+событие OutboxEvent (тема и список id) в той же транзакции, что и
+основная запись. Команда drain_outbox разбирает события пачками и
+вызывает обработчики тем; при OUTBOX_SYNC события разбираются в том же
+процессе сразу после коммита. В пределах транзакции id одной темы
+собираются в одно событие.
+"""
+import logging
+import threading
+from itertools import groupby
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {
+    'search': 'recipes.search.update_documents',
+    'coverage': 'recipes.coverage.publish_changes',
+    'nutrition': 'recipes.nutrition.update_totals',
+    'similar': 'recipes.similar.mark_changed',
+    'feed.push': 'recipes.feed.push_recipes',
+    'feed.follow': 'recipes.feed.follow_authors',
+    'feed.unfollow': 'recipes.feed.unfollow_authors',
+}
+
+# События, записанные в открытой транзакции потока, по темам.
+local = threading.local()
+
+
+def normalize(item):
+    return tuple(item) if isinstance(item, (list, tuple)) else item
+
+
+class Emitted:
+    """Событие темы, записанное в текущей транзакции, и его id.
+
+    Регистрируется как on_commit-колбэк: после коммита снимает отметку и
+    при OUTBOX_SYNC запускает разбор. После отката колбэк не вызывается,
+    но пропадает и строка события: следующий emit её не найдёт и запишет
+    событие заново.
+    """
+
+    def __init__(self, topic, event_id, items):
+        self.topic = topic
+        self.event_id = event_id
+        self.items = items
+
+    def __call__(self):
+        pending = getattr(local, 'pending', {})
+        if pending.get(self.topic) is self:
+            del pending[self.topic]
+        if settings.OUTBOX_SYNC:
+            drain()
+
+
+def emit(topic, items):
+    """Записать событие темы topic в текущей транзакции."""
+    from .models import OutboxEvent
+
+    items = {normalize(item) for item in items}
+    if not items:
+        return
+    if not transaction.get_connection().in_atomic_block:
+        OutboxEvent.objects.create(topic=topic, payload=sorted(items))
+        if settings.OUTBOX_SYNC:
+            drain()
+        return
+    pending = local.__dict__.setdefault('pending', {})
+    emitted = pending.get(topic)
+    if emitted is not None:
+        event = OutboxEvent.objects.filter(id=emitted.event_id, topic=topic)
+        merged = emitted.items | items
+        if merged == emitted.items:
+            found = event.exists()
+        else:
+            found = event.update(payload=sorted(merged))
+        if found:
+            emitted.items = merged
+            return
+    event = OutboxEvent.objects.create(topic=topic, payload=sorted(items))
+    pending[topic] = Emitted(topic, event.id, items)
+    transaction.on_commit(pending[topic])
+
+
+def handle(topic, events):
+    """Вызвать обработчик темы в точке сохранения.
+
+    Возвращает исключение обработчика (его изменения откатываются) или
+    None.
+    """
+    items = dict.fromkeys(
+        normalize(item) for event in events for item in event.payload)
+    try:
+        with transaction.atomic():
+            import_string(HANDLERS[topic])(list(items))
+    except Exception as error:
+        return error
+    return None
+
+
+def drain(batch_size=None):
+    """Обработать накопленные события, возвращает число обработанных.
+
+    События пачки выбираются с SKIP LOCKED, поэтому воркеров может быть
+    несколько. Подряд идущие события одной темы объединяются в один
+    вызов обработчика; пачка удаляется в той же транзакции, что и
+    результаты обработчиков. Если обработчик падает, события группы
+    разбираются по одному: ошибка пишется в лог и в событие, остальные
+    события пачки обрабатываются. Упавшее событие повторяется при
+    следующем вызове drain, после OUTBOX_MAX_ATTEMPTS попыток — нет.
+    """
+    from .models import OutboxEvent
+
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    processed = 0
+    failed = set()
+    while True:
+        with transaction.atomic():
+            events = list(
+                OutboxEvent.objects.select_for_update(skip_locked=True)
+                .filter(attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+                .exclude(id__in=failed).order_by('id')[:batch_size])
+            if not events:
+                return processed
+            for topic, group in groupby(events, key=attrgetter('topic')):
+                group = list(group)
+                error = handle(topic, group)
+                if error is None:
+                    continue
+                errors = (
+                    [(event, handle(topic, [event])) for event in group]
+                    if len(group) > 1 else [(group[0], error)])
+                for event, error in errors:
+                    if error is None:
+                        continue
+                    logger.error(
+                        'Событие outbox %s (%s) не обработано',
+                        event.id, topic, exc_info=error)
+                    event.attempts += 1
+                    event.last_error = f'{type(error).__name__}: {error}'
+                    event.save(update_fields=('attempts', 'last_error'))
+                    failed.add(event.id)
+            OutboxEvent.objects.filter(
+                id__in=[event.id for event in events]).exclude(
+                id__in=failed).delete()
+        processed += sum(event.id not in failed for event in events)
@@ -0,0 +1,118 @@
+"""Рекомендации «с этим рецептом также добавляют в избранное».
+
+Избранное раскладывается в разреженную матрицу пользователи x рецепты U.
+Совместная встречаемость U.T @ U считается блоками по chunk_size
+рецептов, так что в памяти держится только блок chunk_size x рецептов;
+близость — косинус по числу добавлений. Top-K соседей каждого рецепта
+сохраняются в CoFavoriteRecipe. Персональные рекомендации — сумма
+близостей соседей избранных рецептов без уже добавленных, они тоже
+считаются блоками по пользователям и сохраняются в UserRecommendation.
+
+numpy и scipy импортируются только внутри пересчёта.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .similar import top_k_rows
+
+
+def build_matrix():
+    """Идентификаторы пользователей, рецептов и матрица избранного."""
+    import numpy as np
+    from scipy import sparse
+
+    from .models import FavoriteRecipe
+
+    pairs = np.array(
+        list(FavoriteRecipe.recipe.through.objects.order_by().values_list(
+            'favoriterecipe__user_id', 'recipe_id')),
+        dtype=np.int64).reshape(-1, 2)
+    user_ids, users = np.unique(pairs[:, 0], return_inverse=True)
+    recipe_ids, recipes = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (users, recipes)),
+        shape=(len(user_ids), len(recipe_ids)))
+    return user_ids, recipe_ids, matrix
+
+
+def replace_rows(model, owner_field, owner_ids, rows):
+    with transaction.atomic():
+        model.objects.filter(**{f'{owner_field}__in': owner_ids}).delete()
+        model.objects.bulk_create(rows, batch_size=5000)
+
+
+def build_recipe_neighbours(recipe_ids, matrix, k, chunk_size):
+    """Top-K совместно добавляемых рецептов, блоками по рецептам."""
+    import numpy as np
+    from scipy import sparse
+
+    from .models import CoFavoriteRecipe, FavoriteRecipe
+
+    inverse_norms = 1 / np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+    scale = sparse.diags(inverse_norms)
+    by_recipe = matrix.T.tocsr()
+    rows, columns, values = [], [], []
+    for start in range(0, len(recipe_ids), chunk_size):
+        positions = np.arange(start, min(start + chunk_size, len(recipe_ids)))
+        block = (
+            sparse.diags(inverse_norms[positions]) @ by_recipe[positions]
+            @ matrix @ scale).tocsr()
+        neighbours = top_k_rows(block, k, positions)
+        replace_rows(
+            CoFavoriteRecipe, 'recipe_id', recipe_ids[positions].tolist(),
+            [CoFavoriteRecipe(
+                recipe_id=int(recipe_ids[position]),
+                other_id=int(recipe_ids[column]),
+                score=float(score))
+             for position, row in zip(positions, neighbours)
+             for column, score in row])
+        for position, row in zip(positions, neighbours):
+            for column, score in row:
+                rows.append(position)
+                columns.append(column)
+                values.append(score)
+    CoFavoriteRecipe.objects.exclude(
+        recipe__in=FavoriteRecipe.recipe.through.objects.values(
+            'recipe_id')).delete()
+    return sparse.csr_matrix(
+        (values, (rows, columns)), shape=(len(recipe_ids),) * 2)
+
+
+def build_user_recommendations(user_ids, recipe_ids, matrix, neighbours, k,
+                               chunk_size):
+    """Top-K рецептов для каждого пользователя, блоками по пользователям."""
+    import numpy as np
+
+    from .models import FavoriteRecipe, UserRecommendation
+
+    for start in range(0, len(user_ids), chunk_size):
+        positions = np.arange(start, min(start + chunk_size, len(user_ids)))
+        favorites = matrix[positions]
+        scores = favorites @ neighbours
+        scores = (scores - scores.multiply(favorites)).tocsr()
+        scores.eliminate_zeros()
+        recommendations = top_k_rows(scores, k)
+        replace_rows(
+            UserRecommendation, 'user_id', user_ids[positions].tolist(),
+            [UserRecommendation(
+                user_id=int(user_ids[position]),
+                recipe_id=int(recipe_ids[column]),
+                score=float(score))
+             for position, row in zip(positions, recommendations)
+             for column, score in row])
+    UserRecommendation.objects.exclude(
+        user__in=FavoriteRecipe.recipe.through.objects.values(
+            'favoriterecipe__user_id')).delete()
+
+
+def rebuild(k=None, chunk_size=1000):
+    """Пересчитать обе таблицы рекомендаций.
+
+    Возвращает число добавлений в избранное, по которым шёл расчёт.
+    """
+    k = k or settings.RECOMMENDATIONS_TOP_K
+    user_ids, recipe_ids, matrix = build_matrix()
+    neighbours = build_recipe_neighbours(recipe_ids, matrix, k, chunk_size)
+    build_user_recommendations(
+        user_ids, recipe_ids, matrix, neighbours, k, chunk_size)
+    return matrix.nnz
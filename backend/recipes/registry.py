@@ -0,0 +1,95 @@
+"""Кэш справочных таблиц в памяти процесса.
+
+Данные хранятся в каждом воркере, а актуальность проверяется по версии
+в общем кэше: после изменения справочника версия меняется и все воркеры
+перечитывают таблицу при следующем обращении. Таблица всегда читается
+из основной базы: копия с отстающей реплики осталась бы в воркере до
+следующего изменения.
+"""
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from foodgram.replicas import use_replica
+
+
+class ReferenceTable:
+    """Версионированная копия справочной таблицы."""
+
+    def __init__(self, version_key, loader):
+        self.version_key = version_key
+        self.loader = loader
+        self.version = None
+        self.data = None
+
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self):
+        version = self.get_version()
+        if self.version != version:
+            with use_replica(False):
+                self.data = self.loader()
+            self.version = version
+        return self.data
+
+    def invalidate(self):
+        """Сменить версию после коммита изменения.
+
+        Если сменить её раньше, другой воркер может перечитать таблицу
+        до коммита и хранить старые строки под новой версией.
+        """
+        transaction.on_commit(
+            lambda: cache.set(self.version_key, uuid4().hex, None))
+
+
+def _load_tags():
+    from .models import Tag
+
+    by_id, by_slug = {}, {}
+    for tag_id, name, color, slug in Tag.objects.values_list(
+            'id', 'name', 'color', 'slug'):
+        by_id[tag_id] = (name, color, slug)
+        by_slug.setdefault(slug, []).append(tag_id)
+    return {'by_id': by_id, 'by_slug': by_slug}
+
+
+def _load_ingredients():
+    from .models import Ingredient
+
+    return {
+        ingredient_id: (name, measurement_unit)
+        for ingredient_id, name, measurement_unit
+        in Ingredient.objects.values_list('id', 'name', 'measurement_unit')}
+
+
+tags = ReferenceTable('recipes:registry:tags', _load_tags)
+ingredients = ReferenceTable('recipes:registry:ingredients', _load_ingredients)
+
+
+def get_tags():
+    """Словарь id -> (name, color, slug)."""
+    return tags.get()['by_id']
+
+
+def get_tag_ids_by_slug():
+    """Словарь slug -> список id тэгов."""
+    return tags.get()['by_slug']
+
+
+def get_ingredients():
+    """Словарь id -> (name, measurement_unit)."""
+    return ingredients.get()
+
+
+def invalidate_tags():
+    tags.invalidate()
+
+
+def invalidate_ingredients():
+    ingredients.invalidate()
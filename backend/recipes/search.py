@@ -0,0 +1,121 @@
+"""Полнотекстовый поиск по рецептам.
+
+Для каждого рецепта хранится документ RecipeSearchDocument: название,
+имена ингредиентов и описание. На PostgreSQL по нему строится tsvector
+с GIN-индексом, на остальных базах поиск идёт по инвертированному
+индексу в памяти процесса, который перечитывается при смене версии.
+"""
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections, transaction
+from django.db.models import Case, F, FloatField, Value, When
+
+from . import outbox
+from .registry import ReferenceTable
+
+WEIGHTS = {'title': 1.0, 'ingredients': 0.4, 'text': 0.2}
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def is_postgresql(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def _load_index():
+    from .models import RecipeSearchDocument
+
+    index = defaultdict(lambda: defaultdict(float))
+    for row in RecipeSearchDocument.objects.values(
+            'recipe_id', *WEIGHTS).iterator():
+        for field, weight in WEIGHTS.items():
+            for token in tokenize(row[field]):
+                index[token][row['recipe_id']] += weight
+    return {token: dict(recipes) for token, recipes in index.items()}
+
+
+inverted_index = ReferenceTable('recipes:registry:search', _load_index)
+
+
+def update_documents(recipe_ids):
+    """Пересчитать поисковые документы рецептов."""
+    from .models import IngredientForRecipe, Recipe, RecipeSearchDocument
+
+    recipe_ids = list(recipe_ids)
+    ingredients = defaultdict(list)
+    for recipe_id, name in IngredientForRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+    ).order_by('id').values_list('recipe_id', 'ingredient__name'):
+        ingredients[recipe_id].append(name)
+    documents = [
+        RecipeSearchDocument(
+            recipe_id=recipe_id, title=name, text=text,
+            ingredients=' '.join(ingredients[recipe_id]))
+        for recipe_id, name, text in Recipe.objects.filter(
+            id__in=recipe_ids).values_list('id', 'name', 'text')]
+    with transaction.atomic():
+        RecipeSearchDocument.objects.filter(
+            recipe_id__in=recipe_ids).delete()
+        RecipeSearchDocument.objects.bulk_create(documents)
+        if is_postgresql():
+            config = settings.SEARCH_CONFIG
+            RecipeSearchDocument.objects.filter(
+                recipe_id__in=recipe_ids
+            ).update(vector=(
+                SearchVector('title', weight='A', config=config)
+                + SearchVector('ingredients', weight='B', config=config)
+                + SearchVector('text', weight='C', config=config)))
+    if not is_postgresql():
+        inverted_index.invalidate()
+
+
+def schedule_update(recipe_ids):
+    """Обновить документы рецептов в фоне."""
+    outbox.emit('search', recipe_ids)
+
+
+def search(queryset, query):
+    """Отфильтровать рецепты по запросу и отсортировать по релевантности."""
+    if is_postgresql(queryset.db):
+        search_query = SearchQuery(query, config=settings.SEARCH_CONFIG)
+        return queryset.filter(
+            search_document__vector=search_query
+        ).annotate(
+            rank=SearchRank(F('search_document__vector'), search_query)
+        ).order_by('-rank', '-pub_date')
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none()
+    index = inverted_index.get()
+    ranks = None
+    for token in tokens:
+        matches = index.get(token, {})
+        if ranks is None:
+            ranks = dict(matches)
+        else:
+            ranks = {
+                recipe_id: rank + matches[recipe_id]
+                for recipe_id, rank in ranks.items()
+                if recipe_id in matches}
+    if not ranks:
+        return queryset.none()
+    # Ранг — сумма весов полей, различных значений у него единицы даже
+    # при тысячах найденных рецептов. Поэтому рецепты группируются по
+    # рангу в Python, и в CASE попадает одна ветка на значение ранга,
+    # а не на каждый рецепт.
+    ids_by_rank = defaultdict(list)
+    for recipe_id, rank in ranks.items():
+        ids_by_rank[round(rank, 6)].append(recipe_id)
+    return queryset.filter(id__in=ranks).annotate(
+        rank=Case(
+            *[When(id__in=recipe_ids, then=Value(rank))
+              for rank, recipe_ids in ids_by_rank.items()],
+            output_field=FloatField())
+    ).order_by('-rank', '-pub_date')
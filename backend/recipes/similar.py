@@ -0,0 +1,164 @@
+"""Похожие рецепты по ингредиентам и тегам.
+
+Рецепт описывается разреженным вектором признаков (ингредиенты и теги
+с весами idf), близость — косинус. Для каждого рецепта заранее
+считаются top-K соседей и сохраняются в SimilarRecipe, так что выдача —
+один запрос по индексу (recipe, -score). Изменённые рецепты попадают в
+очередь SimilarRecipeQueue и пересчитываются командой
+build_similar_recipes --changed.
+
+numpy и scipy импортируются только при пересчёте, чтобы не замедлять
+запуск веб-воркеров.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from . import outbox
+
+
+def mark_changed(recipe_ids):
+    from .models import Recipe, SimilarRecipeQueue
+
+    recipe_ids = Recipe.objects.filter(
+        id__in=recipe_ids).values_list('id', flat=True)
+    SimilarRecipeQueue.objects.bulk_create(
+        [SimilarRecipeQueue(recipe_id=recipe_id) for recipe_id in recipe_ids],
+        ignore_conflicts=True)
+
+
+def schedule_update(recipe_ids):
+    """Поставить рецепты в очередь пересчёта в фоне."""
+    outbox.emit('similar', recipe_ids)
+
+
+def build_matrix():
+    """Идентификаторы рецептов и нормированная матрица признаков."""
+    import numpy as np
+    from scipy import sparse
+
+    from .models import IngredientForRecipe, Recipe
+
+    ids = np.fromiter(
+        Recipe.objects.order_by('id').values_list('id', flat=True),
+        dtype=np.int64)
+    rows, features = [], []
+    pairs = (
+        (IngredientForRecipe.objects, 'ingredient_id', 0),
+        (Recipe.tags.through.objects, 'tag_id', 1))
+    for manager, feature, kind in pairs:
+        values = np.array(
+            list(manager.order_by().values_list('recipe_id', feature)),
+            dtype=np.int64).reshape(-1, 2)
+        rows.append(np.searchsorted(ids, values[:, 0]))
+        features.append(values[:, 1] * 2 + kind)
+    rows = np.concatenate(rows)
+    _, columns = np.unique(np.concatenate(features), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(len(ids), columns.max() + 1 if len(columns) else 0))
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + len(ids)) / (1 + document_frequency)) + 1
+    matrix = matrix @ sparse.diags(idf)
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    return ids, sparse.diags(1 / norms) @ matrix
+
+
+def top_k(matrix, positions, k):
+    """Для каждой строки positions список (позиция соседа, близость)."""
+    return top_k_rows((matrix[positions] @ matrix.T).tocsr(), k, positions)
+
+
+def top_k_rows(scores, k, exclude=None):
+    """Лучшие k положительных значений каждой строки CSR-матрицы.
+
+    exclude — столбец, который нужно пропустить в каждой строке
+    (сам рецепт).
+    """
+    import numpy as np
+
+    result = []
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        columns = scores.indices[start:end]
+        values = scores.data[start:end]
+        keep = values > 0
+        if exclude is not None:
+            keep &= columns != exclude[row]
+        columns, values = columns[keep], values[keep]
+        if len(values) > k:
+            best = np.argpartition(-values, k)[:k]
+            columns, values = columns[best], values[best]
+        order = np.argsort(-values, kind='stable')
+        result.append(list(zip(columns[order], values[order])))
+    return result
+
+
+def store(ids, matrix, positions, k, batch_size):
+    from .models import SimilarRecipe
+
+    for start in range(0, len(positions), batch_size):
+        batch = positions[start:start + batch_size]
+        neighbours = top_k(matrix, batch, k)
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(
+                recipe_id__in=ids[batch].tolist()).delete()
+            SimilarRecipe.objects.bulk_create(
+                SimilarRecipe(
+                    recipe_id=int(ids[position]),
+                    similar_id=int(ids[column]),
+                    score=float(score))
+                for position, row in zip(batch, neighbours)
+                for column, score in row)
+
+
+def affected_positions(ids, matrix, changed, k):
+    """Позиции рецептов, чьи списки соседей могут измениться.
+
+    Это сами изменённые рецепты, рецепты, у которых они уже в списке,
+    и рецепты, для которых новая близость больше худшего соседа.
+    """
+    import numpy as np
+    from django.db.models import Count, Min
+
+    from .models import SimilarRecipe
+
+    scores = (matrix[changed] @ matrix.T).tocsc()
+    best = scores.max(axis=0).toarray().ravel()
+    candidates = np.flatnonzero(best > 0)
+    worst = {
+        row['recipe_id']: (row['score'], row['count'])
+        for row in SimilarRecipe.objects.filter(
+            recipe_id__in=ids[candidates].tolist()
+        ).values('recipe_id').annotate(
+            score=Min('score'), count=Count('id'))}
+    affected = set(changed.tolist())
+    for position in candidates:
+        score, count = worst.get(int(ids[position]), (0, 0))
+        if count < k or best[position] > score:
+            affected.add(int(position))
+    holders = SimilarRecipe.objects.filter(
+        similar_id__in=ids[changed].tolist()
+    ).values_list('recipe_id', flat=True).distinct()
+    affected.update(np.flatnonzero(np.isin(ids, list(holders))).tolist())
+    return np.array(sorted(affected), dtype=np.int64)
+
+
+def refresh(changed_ids=None, k=None, batch_size=500):
+    """Пересчитать соседей всех рецептов или затронутых изменениями.
+
+    Возвращает число пересчитанных рецептов.
+    """
+    import numpy as np
+
+    k = k or settings.SIMILAR_RECIPES_TOP_K
+    ids, matrix = build_matrix()
+    if changed_ids is None:
+        positions = np.arange(len(ids))
+    else:
+        changed = np.flatnonzero(np.isin(ids, list(changed_ids)))
+        if not len(changed):
+            return 0
+        positions = affected_positions(ids, matrix, changed, k)
+    store(ids, matrix, positions, k, batch_size)
+    return len(positions)
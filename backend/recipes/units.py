@@ -0,0 +1,32 @@
+"""Приведение единиц измерения ингредиентов к базовым.
+
+Таблица составлена по значениям measurement_unit из data/ingredients.csv:
+масса считается в граммах, объём — в миллилитрах. Остальные единицы
+(шт., по вкусу, щепотка, упаковка и т. п.) между собой не переводятся
+и складываются как есть.
+"""
+from django.db.models import Case, F, Value, When
+
+UNITS = {
+    'кг': ('г', 1000),
+    'л': ('мл', 1000),
+    'стакан': ('мл', 200),
+    'ст. л.': ('мл', 15),
+    'ч. л.': ('мл', 5),
+}
+
+
+def base_unit(field):
+    """Выражение с базовой единицей для поля measurement_unit."""
+    return Case(
+        *(When(**{field: unit}, then=Value(base))
+          for unit, (base, _) in UNITS.items()),
+        default=F(field))
+
+
+def unit_factor(field):
+    """Выражение с множителем перевода в базовую единицу."""
+    return Case(
+        *(When(**{field: unit}, then=Value(factor))
+          for unit, (_, factor) in UNITS.items()),
+        default=Value(1))
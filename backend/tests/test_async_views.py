@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from api.async_views import async_view
+
+
+class AsyncViewTest(SimpleTestCase):
+
+    def setUp(self):
+        def view(request):
+            return HttpResponse(threading.current_thread().name)
+
+        self.view = async_view(view)
+
+    def get_thread(self, method):
+        request = getattr(RequestFactory(), method)('/api/recipes/')
+        return asyncio.run(self.view(request)).content.decode()
+
+    def test_reads_run_in_pool(self):
+        for method in ('get', 'head'):
+            with self.subTest(method=method):
+                self.assertTrue(
+                    self.get_thread(method).startswith('async-views'))
+
+    def test_writes_stay_on_sync_path(self):
+        for method in ('post', 'put', 'patch', 'delete'):
+            with self.subTest(method=method):
+                self.assertFalse(
+                    self.get_thread(method).startswith('async-views'))
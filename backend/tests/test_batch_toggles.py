@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (FavoriteRecipe, Recipe, ShoppingCart,
+                            ShoppingCartRecipe)
+from users.models import User
+
+
+class BatchToggleTest(TestCase):
+    """Пакетное добавление и удаление рецептов в избранное и покупки."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='cook@example.com', username='cook',
+            first_name='Cook', last_name='Cook', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            Recipe.objects.create(
+                author=self.user, name=f'Рецепт {number}', text='Текст',
+                cooking_time=5)
+            for number in range(4)]
+        self.ids = [recipe.id for recipe in self.recipes]
+
+    def favorites(self):
+        return set(FavoriteRecipe.recipe.through.objects.filter(
+            favoriterecipe__user=self.user).values_list(
+            'recipe_id', flat=True))
+
+    def cart(self):
+        return set(ShoppingCartRecipe.objects.filter(
+            shopping_cart__user=self.user).values_list(
+            'recipe_id', flat=True))
+
+    def assert_batch(self, url, stored):
+        response = self.client.post(
+            url, {'recipes': self.ids[:2]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()], self.ids[:2])
+        self.assertEqual(stored(), set(self.ids[:2]))
+
+        # Повторы пропускаются, новые рецепты добавляются.
+        response = self.client.post(
+            url, {'recipes': self.ids[1:]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(stored(), set(self.ids))
+
+        response = self.client.delete(
+            url, {'recipes': self.ids[:3]}, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(stored(), {self.ids[3]})
+
+    def test_favorite_for_new_user(self):
+        self.assertFalse(FavoriteRecipe.objects.filter(user=self.user))
+        self.assert_batch('/api/recipes/favorite/', self.favorites)
+        self.assertEqual(
+            FavoriteRecipe.objects.filter(user=self.user).count(), 1)
+
+    def test_shopping_cart_for_new_user(self):
+        self.assertFalse(ShoppingCart.objects.filter(user=self.user))
+        self.assert_batch('/api/recipes/shopping_cart/', self.cart)
+        self.assertEqual(
+            ShoppingCartRecipe.objects.get(recipe_id=self.ids[3]).servings,
+            1)
+
+    def test_unknown_recipe_adds_nothing(self):
+        response = self.client.post(
+            '/api/recipes/favorite/',
+            {'recipes': [self.ids[0], self.ids[-1] + 100]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.favorites(), set())
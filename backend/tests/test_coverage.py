@@ -0,0 +1,123 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from recipes.coverage import (LOG_KEY, SEQUENCE_KEY, CoverageIndex,
+                              ShardedMap, publish_changes)
+
+RECIPES = {
+    1: [10, 20],
+    2: [10, 30, 40],
+    3: [30],
+}
+
+
+def fetch(recipe_ids=None):
+    return {
+        recipe_id: list(ingredient_ids)
+        for recipe_id, ingredient_ids in RECIPES.items()
+        if recipe_ids is None or recipe_id in recipe_ids}
+
+
+class CoverageIndexTest(SimpleTestCase):
+
+    def setUp(self):
+        self.index = CoverageIndex()
+        self.index.fetch = fetch
+        self.index.sync = lambda: None
+        self.index.snapshot = self.index.load()
+
+    def test_rank(self):
+        self.assertEqual(self.index.rank([10, 20, 30]), [
+            (1, 1.0, 2), (3, 1.0, 1), (2, 2 / 3, 2)])
+        self.assertEqual(
+            self.index.rank([10, 20], min_coverage=1), [(1, 1.0, 2)])
+
+    def test_patch_keeps_old_snapshot(self):
+        old = self.index.snapshot
+        with mock.patch.dict(RECIPES, {1: [30]}):
+            self.index.snapshot = self.index.patch(old, {1, 4})
+        self.assertEqual(self.index.rank([20]), [])
+        self.assertEqual(
+            [item[0] for item in self.index.rank([30])], [3, 1, 2])
+        self.assertEqual(list(old.recipes_by_ingredient[20]), [1])
+        self.assertEqual(list(old.recipes_by_ingredient[30]), [2, 3])
+        self.assertEqual(old.ingredients_by_recipe[1], (10, 20))
+
+    def test_patch_copies_only_changed_shards(self):
+        old = self.index.snapshot
+        new = self.index.patch(old, {1})
+        changed = [
+            number for number, (before, after) in enumerate(zip(
+                old.ingredients_by_recipe.shards,
+                new.ingredients_by_recipe.shards))
+            if before is not after]
+        self.assertEqual(changed, [1])
+        self.assertNotIn(4, new.ingredients_by_recipe)
+        self.assertEqual(len(new.ingredients_by_recipe), 3)
+
+    def test_rank_during_patches(self):
+        errors = []
+        stop = time.monotonic() + 0.5
+
+        def read():
+            while time.monotonic() < stop:
+                try:
+                    for _, coverage, _ in self.index.rank([10, 20, 30, 40]):
+                        assert 0 < coverage <= 1
+                except Exception as error:
+                    errors.append(error)
+                    return
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        while time.monotonic() < stop:
+            self.index.snapshot = self.index.patch(
+                self.index.snapshot, {1, 2, 3})
+        for reader in readers:
+            reader.join()
+        self.assertEqual(errors, [])
+
+
+class ShardedMapTest(SimpleTestCase):
+
+    def test_updated_keeps_original(self):
+        old = ShardedMap({1: 'a', 2: 'b'})
+        new = old.updated({1: None, 3: 'c'})
+        self.assertEqual((old.get(1), old.get(3)), ('a', None))
+        self.assertEqual((new.get(1), new[2], new[3]), (None, 'b', 'c'))
+        self.assertEqual(len(new), 2)
+
+
+class PublishChangesTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_log_entry_is_written_before_the_sequence(self):
+        sequences = []
+        add = cache.add
+
+        def record(key, *args):
+            sequences.append(cache.get(SEQUENCE_KEY))
+            return add(key, *args)
+
+        with mock.patch.object(cache, 'add', side_effect=record):
+            publish_changes([1, 2])
+        self.assertEqual(sequences[-1], 0)
+        self.assertEqual(cache.get(SEQUENCE_KEY), 1)
+        self.assertEqual(cache.get(LOG_KEY.format(1)), {1, 2})
+
+    def test_concurrent_publication_takes_next_number(self):
+        publish_changes([1])
+        # Другой воркер уже записал журнал под номером 2, но ещё не
+        # поднял номер.
+        cache.add(LOG_KEY.format(2), {2})
+        publish_changes([3])
+        self.assertEqual(cache.get(LOG_KEY.format(2)), {2})
+        self.assertEqual(cache.get(LOG_KEY.format(3)), {3})
+        self.assertEqual(cache.get(SEQUENCE_KEY), 2)
@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes import feed, outbox
+from recipes.models import Recipe, Subscribe, TimelineEntry
+from users.models import User
+
+LENGTH = 5
+
+
+@override_settings(
+    DATABASE_REPLICAS=[], FEED_TIMELINE_MIN_FOLLOWS=2,
+    FEED_TIMELINE_LENGTH=LENGTH, OUTBOX_SYNC=False)
+class FeedTimelineTest(TestCase):
+    """Материализованная лента совпадает с лентой, собранной при чтении."""
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Reader', last_name='Reader', password='pass')
+        self.authors = [
+            User.objects.create_user(
+                email=f'author{number}@example.com',
+                username=f'author{number}', first_name='Author',
+                last_name='Author', password='pass')
+            for number in range(3)]
+        for number in range(3):
+            for author in self.authors:
+                self.publish(author, number)
+        outbox.drain()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def publish(self, author, number):
+        return Recipe.objects.create(
+            author=author, name=f'Рецепт {number}', text='Текст',
+            cooking_time=5)
+
+    def get_ids(self):
+        # Глубже FEED_TIMELINE_LENGTH записей таблица ленты не хранит.
+        response = self.client.get(f'/api/recipes/feed/?limit={LENGTH}')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def expected_ids(self, authors):
+        return list(Recipe.objects.filter(author__in=authors).order_by(
+            '-pub_date', '-id').values_list('id', flat=True)[:LENGTH])
+
+    def timeline_ids(self):
+        return list(self.reader.timeline.order_by(
+            '-pub_date', '-recipe_id').values_list('recipe_id', flat=True))
+
+    def follow(self, author):
+        response = self.client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+
+    def test_reads_on_the_fly_until_backfill_completes(self):
+        self.follow(self.authors[0])
+        self.follow(self.authors[1])
+        self.assertFalse(feed.uses_timeline(self.reader))
+        self.assertFalse(TimelineEntry.objects.exists())
+        expected = self.expected_ids(self.authors[:2])
+        self.assertEqual(self.get_ids(), expected)
+
+        outbox.drain()
+        self.assertTrue(feed.uses_timeline(self.reader))
+        self.assertEqual(self.timeline_ids(), expected)
+        self.assertEqual(self.get_ids(), expected)
+
+        self.follow(self.authors[2])
+        self.assertFalse(feed.uses_timeline(self.reader))
+        self.assertEqual(self.get_ids(), self.expected_ids(self.authors))
+        outbox.drain()
+        self.assertTrue(feed.uses_timeline(self.reader))
+        self.assertEqual(self.get_ids(), self.expected_ids(self.authors))
+
+    def test_push_keeps_timeline_length(self):
+        for author in self.authors:
+            Subscribe.objects.create(user=self.reader, author=author)
+        outbox.drain()
+        for number in range(3, 7):
+            self.publish(self.authors[number % 3], number)
+        outbox.drain()
+        self.assertTrue(feed.uses_timeline(self.reader))
+        expected = self.expected_ids(self.authors)
+        self.assertEqual(self.timeline_ids(), expected)
+        self.assertEqual(self.get_ids(), expected)
+
+    def test_unfollow_refills_from_remaining_authors(self):
+        for author in self.authors:
+            Subscribe.objects.create(user=self.reader, author=author)
+        outbox.drain()
+        response = self.client.delete(
+            f'/api/users/{self.authors[2].id}/subscribe/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(feed.uses_timeline(self.reader))
+        expected = self.expected_ids(self.authors[:2])
+        self.assertEqual(self.get_ids(), expected)
+        outbox.drain()
+        self.assertEqual(self.timeline_ids(), expected)
+        self.assertEqual(self.get_ids(), expected)
+
+        self.reader.follower.filter(author=self.authors[1]).delete()
+        outbox.drain()
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            self.get_ids(), self.expected_ids(self.authors[:1]))
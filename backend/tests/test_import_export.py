@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+
+from recipes.models import (Ingredient, IngredientForRecipe, OutboxEvent,
+                            Recipe, Tag)
+from users.models import User
+
+
+class ImportExportTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        media_settings = override_settings(
+            MEDIA_ROOT=os.path.join(self.directory, 'media'))
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.output = os.path.join(self.directory, 'recipes.jsonl')
+        self.images = os.path.join(self.directory, 'images')
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        breakfast = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast')
+        flour = Ingredient.objects.create(name='Мука', measurement_unit='г')
+        milk = Ingredient.objects.create(
+            name='Молоко', measurement_unit='мл')
+        self.pub_date = datetime(2020, 5, 1, 8, 30)
+        recipe = Recipe.objects.create(
+            author=self.author, name='Блины', text='Текст',
+            cooking_time=20)
+        recipe.image.save('pancakes.png', ContentFile(b'png'))
+        recipe.tags.set([breakfast])
+        IngredientForRecipe.objects.create(
+            recipe=recipe, ingredient=flour, amount=200)
+        IngredientForRecipe.objects.create(
+            recipe=recipe, ingredient=milk, amount=500)
+        Recipe.objects.filter(id=recipe.id).update(pub_date=self.pub_date)
+        Recipe.objects.create(
+            author=self.author, name='Каша', text='Текст', cooking_time=10)
+
+    def snapshot(self):
+        return [
+            (recipe.author.email, recipe.name, recipe.text,
+             recipe.cooking_time, recipe.pub_date,
+             [tag.slug for tag in recipe.tags.all()],
+             sorted(recipe.recipe.values_list(
+                 'ingredient__name', 'ingredient__measurement_unit',
+                 'amount')),
+             recipe.image.read() if recipe.image else None)
+            for recipe in Recipe.objects.order_by('name')]
+
+    def export(self):
+        call_command(
+            'export_recipes', self.output, images=self.images,
+            stdout=StringIO())
+
+    def import_(self):
+        call_command(
+            'import_recipes', self.output, images=self.images,
+            stdout=StringIO())
+
+    def test_round_trip(self):
+        before = self.snapshot()
+        self.export()
+        Recipe.objects.all().delete()
+        Ingredient.objects.filter(name='Молоко').delete()
+        OutboxEvent.objects.all().delete()
+        self.import_()
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(
+            Recipe.objects.get(name='Блины').pub_date, self.pub_date)
+
+    @override_settings(FEED_TIMELINE_MIN_FOLLOWS=1)
+    def test_import_emits_side_effects(self):
+        self.export()
+        Recipe.objects.all().delete()
+        OutboxEvent.objects.all().delete()
+        self.import_()
+        recipe_ids = sorted(Recipe.objects.values_list('id', flat=True))
+        topics = dict(OutboxEvent.objects.values_list('topic', 'payload'))
+        for topic in ('feed.push', 'search', 'nutrition', 'coverage'):
+            self.assertEqual(sorted(topics[topic]), recipe_ids, topic)
+
+    def test_failed_chunk_removes_images(self):
+        self.export()
+        with open(self.output, encoding='utf-8') as source:
+            rows = [json.loads(line) for line in source]
+        rows[0]['ingredients'][0]['amount'] = -1
+        with open(self.output, 'w', encoding='utf-8') as output:
+            output.writelines(json.dumps(row) + '\n' for row in rows)
+        Recipe.objects.all().delete()
+        recipe_images = os.path.join(
+            self.directory, 'media', 'static', 'recipe')
+        files = set(os.listdir(recipe_images))
+        with self.assertRaises(IntegrityError):
+            self.import_()
+        self.assertEqual(set(os.listdir(recipe_images)), files)
@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.throttles import LoginEmailThrottle
+from users.models import User
+
+URL = '/api/auth/token/login/'
+
+
+class LoginTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='cook@example.com', username='cook',
+            first_name='Cook', last_name='Cook', password='pass')
+        self.client = APIClient()
+
+    def test_non_object_body(self):
+        for body in ([1, 2], 'cook@example.com', 5):
+            response = self.client.post(URL, body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_email_throttle_rejects_before_hashing(self):
+        limit = LoginEmailThrottle().num_requests
+        body = {'email': 'Cook@Example.com ', 'password': 'wrong'}
+        for _ in range(limit):
+            response = self.client.post(URL, body, format='json')
+            self.assertEqual(response.status_code, 400)
+        with mock.patch.object(User, 'check_password') as check_password:
+            response = self.client.post(
+                URL, {'email': 'cook@example.com', 'password': 'pass'},
+                format='json')
+        self.assertEqual(response.status_code, 429)
+        check_password.assert_not_called()
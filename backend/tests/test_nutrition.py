@@ -0,0 +1,136 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes import nutrition
+from recipes.models import Ingredient, IngredientForRecipe, Recipe, Tag
+from users.models import User
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==')
+
+
+@override_settings(DATABASE_REPLICAS=[])
+class NutritionTotalsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        flour = Ingredient.objects.create(
+            name='Мука', measurement_unit='г',
+            kcal=3.5, protein=0.1, fat=0.01, carbs=0.7)
+        milk = Ingredient.objects.create(
+            name='Молоко', measurement_unit='мл',
+            kcal=0.6, protein=0.03, fat=0.03, carbs=0.05)
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        self.known = self.create_recipe('Блины', (flour, 200), (milk, 500))
+        self.light = self.create_recipe('Молоко', (milk, 100))
+        self.unknown = self.create_recipe(
+            'Солёные блины', (flour, 200), (salt, 5))
+        self.empty = self.create_recipe('Без ингредиентов')
+        Recipe.objects.update(kcal=0, protein=0, fat=0, carbs=0)
+        nutrition.update_totals()
+        self.client = APIClient()
+
+    def create_recipe(self, name, *ingredients):
+        recipe = Recipe.objects.create(
+            author=self.author, name=name, text='Текст', cooking_time=5)
+        IngredientForRecipe.objects.bulk_create(
+            IngredientForRecipe(
+                recipe=recipe, ingredient=ingredient, amount=amount)
+            for ingredient, amount in ingredients)
+        return recipe
+
+    def totals(self, recipe):
+        recipe.refresh_from_db()
+        return [getattr(recipe, field) for field in nutrition.FIELDS]
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/recipes/?limit=100&{query}')
+        self.assertEqual(response.status_code, 200)
+        return {recipe['id'] for recipe in response.json()['results']}
+
+    def test_totals_sum_amount_times_value(self):
+        for total, expected in zip(
+                self.totals(self.known), (1000, 35, 17, 165)):
+            self.assertAlmostEqual(total, expected)
+
+    def test_unknown_value_leaves_total_null(self):
+        self.assertEqual(self.totals(self.unknown), [None] * 4)
+        self.assertEqual(self.totals(self.empty), [None] * 4)
+
+    def test_partially_known_field(self):
+        Ingredient.objects.filter(name='Молоко').update(fat=None)
+        nutrition.update_totals([self.known.id])
+        kcal, _, fat, _ = self.totals(self.known)
+        self.assertAlmostEqual(kcal, 1000)
+        self.assertIsNone(fat)
+
+    def test_range_filters_skip_unknown_totals(self):
+        self.assertEqual(self.get_ids('kcal_max=100'), {self.light.id})
+        self.assertEqual(
+            self.get_ids('kcal_min=0'), {self.known.id, self.light.id})
+        self.assertEqual(
+            self.get_ids('protein_min=10&carbs_max=200'), {self.known.id})
+        self.assertEqual(len(self.get_ids('')), 4)
+
+    def test_unknown_totals_are_null_in_response(self):
+        response = self.client.get(f'/api/recipes/{self.unknown.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['kcal'])
+
+
+@override_settings(DATABASE_REPLICAS=[], OUTBOX_SYNC=False)
+class RecipeWriteNutritionTest(TestCase):
+    """Ответ на запись рецепта содержит итоги новых ингредиентов."""
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast')
+        self.flour = Ingredient.objects.create(
+            name='Мука', measurement_unit='г', kcal=3.5, protein=0.1,
+            fat=0.01, carbs=0.7)
+        self.salt = Ingredient.objects.create(
+            name='Соль', measurement_unit='г')
+
+    def body(self, *ingredients):
+        return {
+            'name': 'Блины', 'text': 'Текст', 'cooking_time': 5,
+            'image': IMAGE, 'tags': [self.tag.id],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient, amount in ingredients]}
+
+    def test_create_and_update_return_fresh_totals(self):
+        response = self.client.post(
+            '/api/recipes/', self.body((self.flour, 100)), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertAlmostEqual(response.json()['kcal'], 350)
+        recipe_id = response.json()['id']
+        response = self.client.patch(
+            f'/api/recipes/{recipe_id}/',
+            self.body((self.flour, 200)), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.json()['kcal'], 700)
+        self.assertAlmostEqual(Recipe.objects.get().kcal, 700)
+        response = self.client.patch(
+            f'/api/recipes/{recipe_id}/',
+            self.body((self.flour, 200), (self.salt, 1)), format='json')
+        self.assertIsNone(response.json()['kcal'])
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from recipes import outbox
+from recipes.models import OutboxEvent, Tag
+
+calls = []
+
+
+def record(items):
+    Tag.objects.create(
+        name=f'tag {items}', color=f'#{len(calls):06}',
+        slug=f'tag-{len(calls)}')
+    if 'bad' in items:
+        raise ValueError('bad')
+    calls.append(items)
+
+
+@mock.patch.dict(outbox.HANDLERS, {
+    'test': f'{__name__}.record', 'other': f'{__name__}.record'})
+class OutboxTest(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_emit_merges_topic_within_transaction(self):
+        with transaction.atomic():
+            outbox.emit('test', [1, 2])
+            outbox.emit('test', [2, 3])
+            outbox.emit('test', [3])
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('topic', 'payload')),
+            [('test', [1, 2, 3])])
+
+    def test_emit_after_rolled_back_savepoint(self):
+        try:
+            with transaction.atomic():
+                outbox.emit('test', [1])
+                raise ValueError
+        except ValueError:
+            pass
+        outbox.emit('test', [1])
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('payload', flat=True)),
+            [[1]])
+
+    def test_failing_event_does_not_block_batch(self):
+        for topic, payload in (
+                ('test', [1]), ('test', ['bad']), ('test', [2]),
+                ('other', [3])):
+            OutboxEvent.objects.create(topic=topic, payload=payload)
+        with self.assertLogs('recipes.outbox', 'ERROR'):
+            self.assertEqual(outbox.drain(), 3)
+        self.assertEqual(calls, [[1], [2], [3]])
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.payload, ['bad'])
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, 'ValueError: bad')
+        # Изменения упавшего вызова обработчика откатываются.
+        self.assertEqual(Tag.objects.count(), 3)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_event_is_skipped_after_max_attempts(self):
+        OutboxEvent.objects.create(topic='test', payload=['bad'])
+        with self.assertLogs('recipes.outbox', 'ERROR'):
+            self.assertEqual(outbox.drain(), 0)
+            self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(OutboxEvent.objects.get().attempts, 2)
+
+    def test_unknown_topic_is_recorded(self):
+        OutboxEvent.objects.create(topic='missing', payload=[1])
+        with self.assertLogs('recipes.outbox', 'ERROR'):
+            self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(
+            OutboxEvent.objects.get().last_error, "KeyError: 'missing'")
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import User
+
+
+@override_settings(DATABASE_REPLICAS=[], ESTIMATED_COUNT_THRESHOLD=1)
+class EstimatedCountPaginationTest(TestCase):
+    """Страницы сверяются с выборкой, а не с закэшированным count."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        self.create_recipes(6)
+        self.client = APIClient()
+        self.assertEqual(self.get_page(1)['count'], 6)
+
+    def create_recipes(self, number):
+        for _ in range(number):
+            Recipe.objects.create(
+                author=self.author, name='Рецепт', text='Текст',
+                cooking_time=5)
+
+    def get_page(self, page):
+        response = self.client.get(f'/api/recipes/?limit=2&page={page}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_page_past_the_end_is_clamped(self):
+        Recipe.objects.filter(
+            id__in=Recipe.objects.order_by('id').values('id')[:3]).delete()
+        data = self.get_page(3)
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next'])
+
+    def test_pages_past_a_low_estimate_are_served(self):
+        self.create_recipes(4)
+        data = self.get_page(3)
+        self.assertEqual(data['count'], 7)
+        self.assertIsNotNone(data['next'])
+        data = self.get_page(5)
+        self.assertEqual(data['count'], 10)
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNone(data['next'])
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=0)
+    def test_exact_count_keeps_not_found(self):
+        response = self.client.get('/api/recipes/?limit=2&page=4')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Tag
+from users.models import User
+
+MANY = 20
+
+
+@override_settings(DATABASE_REPLICAS=[])
+class RecipeTagFilterTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        self.reader = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Reader', last_name='Reader', password='pass')
+        breakfast, lunch, dinner = (
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Завтрак', '#E26C2D', 'breakfast'),
+                ('Обед', '#49B64E', 'lunch'),
+                ('Ужин', '#8775D2', 'dinner')))
+        self.both = self.create_recipe('Оба тэга', breakfast, lunch)
+        self.lunch = self.create_recipe('Обед', lunch)
+        self.dinner = self.create_recipe('Ужин', dinner)
+        self.untagged = self.create_recipe('Без тэгов')
+        self.client = APIClient()
+
+    def create_recipe(self, name, *tags):
+        recipe = Recipe.objects.create(
+            author=self.author, name=name, text='Текст', cooking_time=5)
+        recipe.tags.set(tags)
+        return recipe
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/recipes/?limit=100&{query}')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        ids = [recipe['id'] for recipe in data['results']]
+        self.assertEqual(data['count'], len(ids))
+        return ids
+
+    def test_recipe_with_several_tags_is_returned_once(self):
+        ids = self.get_ids('tags=breakfast&tags=lunch')
+        self.assertCountEqual(ids, [self.both.id, self.lunch.id])
+
+    def test_repeated_slug(self):
+        ids = self.get_ids('tags=lunch&tags=lunch')
+        self.assertCountEqual(ids, [self.both.id, self.lunch.id])
+
+    def test_unknown_slug_returns_nothing(self):
+        self.assertEqual(self.get_ids('tags=unknown'), [])
+
+    def test_unknown_slug_is_ignored_next_to_known(self):
+        self.assertEqual(
+            self.get_ids('tags=unknown&tags=dinner'), [self.dinner.id])
+
+    def test_no_tags_returns_all(self):
+        self.assertEqual(len(self.get_ids('')), 4)
+
+    def test_new_tag_is_visible_to_filter(self):
+        self.get_ids('tags=snack')
+        # Справочник тэгов сбрасывается после коммита.
+        with self.captureOnCommitCallbacks(execute=True):
+            snack = Tag.objects.create(
+                name='Перекус', color='#FFFFFF', slug='snack')
+        self.untagged.tags.add(snack)
+        self.assertEqual(self.get_ids('tags=snack'), [self.untagged.id])
+
+    def assert_queries_do_not_grow(self, query, queries):
+        """Число запросов не зависит от числа рецептов на странице."""
+        self.get_ids(query)
+        with self.assertNumQueries(queries):
+            self.get_ids(query)
+        tags = Tag.objects.filter(slug__in=('breakfast', 'lunch'))
+        for number in range(MANY):
+            self.create_recipe(f'Рецепт {number}', *tags)
+        with self.assertNumQueries(queries):
+            ids = self.get_ids(query)
+        self.assertEqual(len(ids), MANY + 2)
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_queries_anonymous(self):
+        # count, страница, тэги и ингредиенты.
+        self.assert_queries_do_not_grow('tags=breakfast&tags=lunch', 4)
+
+    def test_queries_authenticated(self):
+        self.client.force_authenticate(self.reader)
+        # И подписки на авторов страницы одним запросом.
+        self.assert_queries_do_not_grow('tags=breakfast&tags=lunch', 5)
@@ -0,0 +1,34 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes import registry
+from recipes.models import Ingredient, Tag
+
+
+class RegistryInvalidationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_changes_only_after_commit(self):
+        version = registry.ingredients.get_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ingredient = Ingredient.objects.create(
+                name='Мука', measurement_unit='г')
+            # До коммита другой воркер перечитал бы таблицу под новой
+            # версией без этой строки.
+            self.assertEqual(registry.ingredients.get_version(), version)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(registry.ingredients.get_version(), version)
+        self.assertIn(ingredient.id, registry.get_ingredients())
+
+    def test_tags_reload_after_commit(self):
+        self.assertEqual(registry.get_tags(), {})
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(
+                name='Завтрак', color='#E26C2D', slug='breakfast')
+            self.assertEqual(registry.get_tags(), {})
+        self.assertEqual(
+            registry.get_tags(), {tag.id: ('Завтрак', '#E26C2D', 'breakfast')})
+        self.assertEqual(
+            registry.get_tag_ids_by_slug(), {'breakfast': [tag.id]})
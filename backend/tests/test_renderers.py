@@ -0,0 +1,76 @@
+import datetime
+import math
+from decimal import Decimal
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import FastJSONRenderer, orjson
+from recipes.models import Ingredient
+
+
+@skipIf(orjson is None, 'orjson не установлен')
+class FastJSONRendererTest(SimpleTestCase):
+
+    def assert_same(self, data):
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_regular_data(self):
+        self.assert_same({
+            'id': 1, 'name': 'Борщ ', 'tags': [{'slug': 'lunch'}],
+            'kcal': 123.45, 'coverage': 2 / 3, 'image': None,
+            'pub_date': datetime.datetime(2026, 10, 19, 4, 20),
+            'amount': Decimal('1.50'), 'big': 2 ** 70})
+
+    def test_exponent_floats(self):
+        for value in (1e16, -1e16, 1.5e300, 1e-7, 1e-5, -2.5e-10, 5e-324,
+                      9999999999999998.0, 0.0001, 0.0, -0.0):
+            with self.subTest(value=value):
+                self.assert_same({'kcal': value, 'items': [[value]]})
+
+    def test_float_sweep(self):
+        values = [
+            sign * mantissa * 10.0 ** exponent
+            for sign in (1, -1) for mantissa in (1, 1.5, 9.87654321)
+            for exponent in range(-30, 31)]
+        for value in values:
+            with self.subTest(value=value):
+                self.assert_same([value])
+        self.assert_same({'values': values})
+
+    def test_exponent_float_from_encoder_default(self):
+        self.assert_same({'amount': Decimal('1e20')})
+
+    def test_exponent_like_strings(self):
+        self.assert_same({'name': 'Яйца 2e, 0.00001 и 12345678901234567'})
+
+    def test_non_finite_floats_render_as_null(self):
+        # Единственное расхождение с JSONRenderer, оно задокументировано.
+        for value in (math.nan, math.inf, -math.inf):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'kcal': value})
+                self.assertEqual(
+                    FastJSONRenderer().render({'items': [{'kcal': value}]}),
+                    b'{"items":[{"kcal":null}]}')
+
+
+@skipIf(orjson is None, 'orjson не установлен')
+@override_settings(DATABASE_REPLICAS=[], JSON_BACKEND='orjson')
+class IngredientListRenderTest(TestCase):
+    """Ответ API совпадает с выводом JSONRenderer."""
+
+    def test_ingredient_list(self):
+        cache.clear()
+        for number, kcal in enumerate((3.5, 1e-5, 0.00012, None, 2 / 3)):
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г',
+                kcal=kcal, protein=1e-7 if kcal else None)
+        response = APIClient().get('/api/ingredients/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content, JSONRenderer().render(response.data))
@@ -0,0 +1,139 @@
+import asyncio
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.replicas import (PIN_KEY, ReplicaRouter, is_pinned,
+                               pin_primary_middleware, use_replica)
+from recipes.checks import check_shared_cache
+from recipes.models import Tag
+from users.models import User
+
+
+class ReplicaRouterTest(TestCase):
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_default_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Tag))
+
+    def test_reads_go_to_replica_inside_use_replica(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Tag), 'replica_1')
+            self.assertEqual(
+                self.router.db_for_write(Tag), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.db_for_read(Tag))
+
+    def test_disabled_use_replica_reads_default(self):
+        with use_replica(False):
+            self.assertIsNone(self.router.db_for_read(Tag))
+
+    def test_cache_table_is_read_from_default(self):
+        from django.core.cache.backends.db import DatabaseCache
+
+        cache_model = DatabaseCache('django_cache', {}).cache_model_class
+        with use_replica():
+            self.assertEqual(
+                self.router.db_for_read(cache_model), DEFAULT_DB_ALIAS)
+
+    def test_no_migrations_on_replica(self):
+        self.assertFalse(self.router.allow_migrate('replica_1', 'recipes'))
+        self.assertIsNone(
+            self.router.allow_migrate(DEFAULT_DB_ALIAS, 'recipes'))
+
+
+class ReplicaReadTest(TestCase):
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        cache.clear()
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='primary')
+        Tag.objects.using('replica_1').create(
+            name='Ужин', color='#49B64E', slug='replica')
+        self.user = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Reader', last_name='Reader', password='pass')
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}')
+
+    def tag_slugs(self):
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        return [tag['slug'] for tag in response.json()]
+
+    def test_safe_list_reads_from_replica(self):
+        self.assertEqual(self.tag_slugs(), ['replica'])
+
+    def test_write_pins_user_to_primary(self):
+        response = self.client.post(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(is_pinned(self.user))
+        self.assertEqual(self.tag_slugs(), ['primary'])
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post(f'/api/users/{self.user.id}/subscribe/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(is_pinned(self.user))
+        self.assertEqual(self.tag_slugs(), ['replica'])
+
+
+class PinPrimaryMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='writer@example.com', username='writer',
+            first_name='Writer', last_name='Writer', password='pass')
+
+    def request(self, method):
+        request = getattr(RequestFactory(), method)('/api/')
+        request.user = self.user
+        return request
+
+    def test_sync_middleware_pins_after_write(self):
+        middleware = pin_primary_middleware(lambda request: HttpResponse())
+        middleware(self.request('get'))
+        self.assertIsNone(cache.get(PIN_KEY.format(self.user.id)))
+        middleware(self.request('post'))
+        self.assertIsNotNone(cache.get(PIN_KEY.format(self.user.id)))
+
+    def test_async_middleware_stays_async(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = pin_primary_middleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        asyncio.run(middleware(self.request('post')))
+        self.assertIsNotNone(cache.get(PIN_KEY.format(self.user.id)))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_pin_is_not_checked_without_replicas(self):
+        cache.set(PIN_KEY.format(self.user.id), 1)
+        with mock.patch.object(cache, 'get') as get:
+            self.assertFalse(is_pinned(self.user))
+        get.assert_not_called()
+
+
+class DatabaseCacheCheckTest(TestCase):
+
+    def check_ids(self):
+        return [error.id for error in check_shared_cache(None)]
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache'}})
+    def test_database_cache_with_replicas_warns(self):
+        self.assertIn('recipes.W003', self.check_ids())
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertNotIn('recipes.W003', self.check_ids())
@@ -0,0 +1,104 @@
+from unittest import skipIf, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes import outbox, search
+from recipes.models import Ingredient, IngredientForRecipe, Recipe
+from users.models import User
+
+
+class SearchTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        self.apples = Ingredient.objects.create(
+            name='Яблоки', measurement_unit='г')
+        self.flour = Ingredient.objects.create(
+            name='Мука', measurement_unit='г')
+        self.pie = self.create_recipe(
+            'Яблочный пирог', 'Печь час', self.apples, self.flour)
+        self.charlotte = self.create_recipe(
+            'Шарлотка', 'Нарезать яблоки', self.apples, self.flour)
+        self.pancakes = self.create_recipe('Блины', 'Жарить', self.flour)
+        self.drain()
+        self.client = APIClient()
+
+    def create_recipe(self, name, text, *ingredients):
+        recipe = Recipe.objects.create(
+            author=self.author, name=name, text=text, cooking_time=5)
+        IngredientForRecipe.objects.bulk_create(
+            IngredientForRecipe(recipe=recipe, ingredient=ingredient,
+                                amount=100)
+            for ingredient in ingredients)
+        search.schedule_update([recipe.id])
+        return recipe
+
+    def drain(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.drain()
+
+    def get_ids(self, query):
+        response = self.client.get(
+            '/api/recipes/', {'limit': 100, 'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_all_words_must_match(self):
+        self.assertCountEqual(
+            self.get_ids('мука'),
+            [self.pie.id, self.charlotte.id, self.pancakes.id])
+        self.assertEqual(self.get_ids('шарлотка мука'), [self.charlotte.id])
+        self.assertEqual(self.get_ids('шарлотка жарить'), [])
+
+    def test_blank_query_is_ignored(self):
+        self.assertEqual(len(self.get_ids('  ')), 3)
+
+    def test_document_follows_recipe_changes(self):
+        Recipe.objects.filter(id=self.pancakes.id).update(name='Оладьи')
+        search.schedule_update([self.pancakes.id])
+        self.drain()
+        self.assertEqual(self.get_ids('оладьи'), [self.pancakes.id])
+        self.assertEqual(self.get_ids('блины'), [])
+
+
+@skipIf(connection.vendor == 'postgresql', 'Проверяется на PostgreSQL')
+@override_settings(DATABASE_REPLICAS=[], OUTBOX_SYNC=False)
+class InvertedIndexSearchTest(SearchTestMixin, TestCase):
+    """Поиск по инвертированному индексу на базах кроме PostgreSQL."""
+
+    def test_title_outranks_ingredients_and_text(self):
+        self.assertEqual(
+            self.get_ids('яблоки'), [self.charlotte.id, self.pie.id])
+        self.assertEqual(
+            self.get_ids('яблочный'), [self.pie.id])
+
+    def test_case_has_one_branch_per_rank(self):
+        for number in range(30):
+            self.create_recipe(
+                f'Торт {number}', 'Текст', self.apples)
+        self.drain()
+        with CaptureQueriesContext(connection) as queries:
+            ids = self.get_ids('торт')
+        self.assertEqual(len(ids), 30)
+        sql = next(
+            query['sql'] for query in queries.captured_queries
+            if 'CASE' in query['sql'] and 'LIMIT' in query['sql'])
+        self.assertEqual(sql.count('WHEN'), 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Нужен PostgreSQL')
+@override_settings(DATABASE_REPLICAS=[], OUTBOX_SYNC=False)
+class PostgresSearchTest(SearchTestMixin, TestCase):
+    """Поиск по tsvector на PostgreSQL."""
+
+    def test_title_outranks_text(self):
+        ids = self.get_ids('торт')
+        self.assertEqual(ids, [self.pie.id])
+        self.assertEqual(self.get_ids('пирогами'), [self.pie.id])
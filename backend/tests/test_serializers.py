@@ -0,0 +1,66 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeReadSerializer
+from api.views import RecipesViewSet
+from recipes import registry
+from recipes.models import Ingredient, IngredientForRecipe, Recipe, Tag
+from users.models import User
+
+
+class RecipeListSerializerTest(TestCase):
+    """Быстрый список рецептов совпадает с вложенными сериализаторами."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast')
+        self.flour = Ingredient.objects.create(
+            name='Мука', measurement_unit='г')
+        milk = Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+        for name, ingredients in (
+                ('Блины', ((self.flour, 200), (milk, 500))),
+                ('Каша', ((milk, 300),)),
+                ('Без ингредиентов', ())):
+            recipe = Recipe.objects.create(
+                author=self.author, name=name, text='Текст', cooking_time=5)
+            recipe.tags.set([tag])
+            IngredientForRecipe.objects.bulk_create(
+                IngredientForRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=amount)
+                for ingredient, amount in ingredients)
+
+    def render(self, user, serializer_class):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        view = RecipesViewSet(request=request, format_kwarg=None)
+        recipes = view.get_queryset().order_by('id')
+        context = {'request': request}
+        if serializer_class is None:
+            serializer = RecipeReadSerializer(
+                recipes, many=True, context=context)
+        else:
+            serializer = serializer_class(
+                recipes, child=RecipeReadSerializer(), context=context)
+        return JSONRenderer().render(serializer.data)
+
+    def test_matches_nested_serializers(self):
+        for user in (self.author, AnonymousUser()):
+            with self.subTest(user=user):
+                self.assertEqual(
+                    self.render(user, None),
+                    self.render(user, ListSerializer))
+
+    def test_ingredient_names_come_from_the_query(self):
+        registry.get_ingredients()
+        # update() не шлёт сигналов: справочник остаётся со старым именем.
+        Ingredient.objects.filter(id=self.flour.id).update(name='Мука в/с')
+        self.assertIn('Мука в/с', self.render(self.author, None).decode())
@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (Ingredient, IngredientForRecipe, Recipe,
+                            ShoppingCart, ShoppingCartRecipe)
+from recipes.units import UNITS
+from users.models import User
+
+INGREDIENTS = (
+    ('Мука', 'г'), ('Мука', 'кг'), ('Молоко', 'мл'), ('Молоко', 'л'),
+    ('Молоко', 'стакан'), ('Сахар', 'ч. л.'), ('Сахар', 'г'),
+    ('Яйца', 'шт.'), ('Соль', 'по вкусу'), ('Масло', 'ст. л.'),
+)
+RECIPES = 300
+
+
+class ShoppingCartTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='cook@example.com', username='cook',
+            first_name='Cook', last_name='Cook', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in INGREDIENTS)
+        Recipe.objects.bulk_create(
+            Recipe(author=self.user, name=f'Рецепт {number}',
+                   text='Текст', cooking_time=10)
+            for number in range(RECIPES))
+        # SQLite не возвращает id из bulk_create.
+        self.ingredients = list(Ingredient.objects.order_by('id'))
+        self.recipes = list(Recipe.objects.order_by('id'))
+        IngredientForRecipe.objects.bulk_create(
+            IngredientForRecipe(
+                recipe=recipe, ingredient=ingredient,
+                amount=number % 7 + position + 1)
+            for number, recipe in enumerate(self.recipes)
+            for position, ingredient in enumerate(self.ingredients)
+            if (number + position) % 3)
+        cart = ShoppingCart.objects.create(user=self.user)
+        ShoppingCartRecipe.objects.bulk_create(
+            ShoppingCartRecipe(
+                shopping_cart=cart, recipe=recipe, servings=number % 4 + 1)
+            for number, recipe in enumerate(self.recipes))
+
+    def expected_list(self):
+        servings = dict(ShoppingCartRecipe.objects.values_list(
+            'recipe_id', 'servings'))
+        totals = defaultdict(int)
+        for name, unit, recipe_id, amount in (
+                IngredientForRecipe.objects.values_list(
+                    'ingredient__name', 'ingredient__measurement_unit',
+                    'recipe_id', 'amount')):
+            base, factor = UNITS.get(unit, (unit, 1))
+            totals[name, base] += amount * servings[recipe_id] * factor
+        return ['Cписок покупок:'] + [
+            f'{name} ({unit}) - {amount}'
+            for (name, unit), amount in sorted(totals.items())]
+
+    def download(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().split('\n')
+
+    def test_large_cart_is_aggregated_in_one_query(self):
+        with self.assertNumQueries(1):
+            lines = self.download()
+        self.assertEqual(lines, self.expected_list())
+        # Единицы приводятся к базовым: одна строка на ингредиент и единицу.
+        self.assertEqual(len(lines), 1 + 7)
+
+    def test_servings_change_totals(self):
+        ShoppingCartRecipe.objects.update(servings=1)
+        single = self.download()
+        ShoppingCartRecipe.objects.update(servings=2)
+        double = self.download()
+        self.assertEqual(double, self.expected_list())
+        for one, two in zip(single[1:], double[1:]):
+            self.assertEqual(
+                int(two.rsplit(' ', 1)[1]), 2 * int(one.rsplit(' ', 1)[1]))
+
+    def test_empty_cart(self):
+        ShoppingCartRecipe.objects.all().delete()
+        self.assertEqual(self.download(), ['Cписок покупок:'])
+
+    def test_patch_requires_servings(self):
+        recipe = self.recipes[2]
+        url = f'/api/recipes/{recipe.id}/shopping_cart/'
+        response = self.client.patch(url, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('servings', response.json())
+        entry = ShoppingCartRecipe.objects.get(recipe=recipe)
+        self.assertEqual(entry.servings, 3)
+        response = self.client.patch(url, {'servings': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        entry.refresh_from_db()
+        self.assertEqual(entry.servings, 5)
+
+    def test_post_defaults_servings(self):
+        recipe = self.recipes[0]
+        ShoppingCartRecipe.objects.filter(recipe=recipe).delete()
+        response = self.client.post(
+            f'/api/recipes/{recipe.id}/shopping_cart/', {}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            ShoppingCartRecipe.objects.get(recipe=recipe).servings, 1)
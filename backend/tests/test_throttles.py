@@ -0,0 +1,29 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from api.throttles import LoginIPThrottle, local_cache
+
+
+class CounterFallbackTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.throttle = LoginIPThrottle()
+
+    def test_unavailable_cache_falls_back_with_warning(self):
+        with mock.patch.object(
+                cache, 'add', side_effect=ConnectionRefusedError):
+            with self.assertLogs('api.throttles', 'WARNING') as logs:
+                self.assertEqual(self.throttle.incr('key'), 1)
+                self.assertEqual(self.throttle.incr('key'), 2)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIsNone(cache.get('key'))
+
+    def test_programming_errors_are_not_hidden(self):
+        with mock.patch.object(cache, 'add', side_effect=TypeError):
+            with self.assertRaises(TypeError):
+                self.throttle.incr('key')
+        self.assertIsNone(local_cache.get('key'))
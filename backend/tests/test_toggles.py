@@ -0,0 +1,81 @@
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCartRecipe
+from users.models import User
+
+THREADS = 8
+
+
+class ConcurrentToggleTest(TransactionTestCase):
+    """Один и тот же переключатель из многих потоков одновременно."""
+
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='cook@example.com', username='cook',
+            first_name='Cook', last_name='Cook', password='pass')
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='pass')
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Текст', cooking_time=5)
+
+    def hammer(self, method, url):
+        """Статусы ответов THREADS одновременных запросов."""
+        barrier = threading.Barrier(THREADS)
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def send():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                status = getattr(client, method)(url).status_code
+            except Exception as error:
+                status = repr(error)
+            finally:
+                connections.close_all()
+            with lock:
+                statuses[status] += 1
+
+        threads = [threading.Thread(target=send) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def assert_toggle(self, url, entries):
+        self.assertEqual(
+            self.hammer('post', url), {201: 1, 400: THREADS - 1})
+        self.assertEqual(entries().count(), 1)
+        self.assertEqual(
+            self.hammer('delete', url), {204: 1, 400: THREADS - 1})
+        self.assertEqual(entries().count(), 0)
+
+    def test_favorite(self):
+        self.assert_toggle(
+            f'/api/recipes/{self.recipe.id}/favorite/',
+            lambda: FavoriteRecipe.recipe.through.objects.filter(
+                favoriterecipe__user=self.user))
+        self.assertEqual(FavoriteRecipe.objects.count(), 1)
+
+    def test_shopping_cart(self):
+        self.assert_toggle(
+            f'/api/recipes/{self.recipe.id}/shopping_cart/',
+            lambda: ShoppingCartRecipe.objects.filter(
+                shopping_cart__user=self.user))
+
+    def test_subscribe(self):
+        self.assert_toggle(
+            f'/api/users/{self.author.id}/subscribe/',
+            self.user.follower.all)
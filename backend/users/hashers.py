@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (Argon2PasswordHasher,
+                                         BCryptSHA256PasswordHasher)
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 с параметрами из настроек."""
+
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class TunableBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    """BCrypt с числом раундов из настроек."""
+
+    rounds = settings.BCRYPT_ROUNDS